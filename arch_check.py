@@ -9,15 +9,41 @@ def check_smart(as_dict=False):
     try:
         devs = glob.glob('/dev/sd?') + glob.glob('/dev/nvme*n1')
         if not devs:
-            if as_dict:
-                summary["status"] = "no_disks"
-                summary["error"] = "No disks found for SMART check."
-                return {"devices": [], **summary}
-            print_header("SMART Disk Health Summary")
-            print(f"{YELLOW}No disks found for SMART check.{RESET}")
-            return
+            summary["status"] = "no_disks"
+            summary["error"] = "No disks found for SMART check."
+            if not as_dict:
+                print_header("SMART Disk Health Summary")
+                print(f"{YELLOW}No disks found for SMART check.{RESET}")
+            return {"devices": [], **summary}
         for dev in devs:
             dev_result = {"device": dev, "status": None, "attributes": [], "error": None}
+            if dev.startswith('/dev/nvme'):
+                # Native health log first: no smartctl, no process spawn
+                try:
+                    log = decode_nvme_smart_log(read_nvme_smart_log(nvme_controller(dev)))
+                except (OSError, ValueError) as e:
+                    logging.debug(f"NVMe ioctl health log failed for {dev}: {e}")
+                    log = None
+                if log is not None:
+                    dev_result["source"] = "nvme-ioctl"
+                    dev_result["nvme"] = log
+                    dev_result["attributes"] = nvme_health_attributes(log)
+                    if log["critical_warning"]:
+                        dev_result["status"] = "FAILED: " + ", ".join(log["critical_warnings"])
+                        summary["issues"] += 1
+                        summary["status"] = "attention"
+                        if not as_dict:
+                            print(f"{RED}{dev}: {dev_result['status']}{RESET}")
+                        issue_count += 1
+                    else:
+                        dev_result["status"] = "PASSED"
+                        if not as_dict:
+                            print(f"{GREEN}{dev}: PASSED{RESET}")
+                    if not as_dict:
+                        for line in dev_result["attributes"]:
+                            print(f"  {line}")
+                    results.append(dev_result)
+                    continue
             try:
                 out = subprocess.check_output(["smartctl", "-H", dev], text=True, stderr=subprocess.STDOUT)
                 if "PASSED" in out:
@@ -49,21 +75,21 @@ def check_smart(as_dict=False):
                 if not as_dict:
                     print(f"{RED}{dev}: SMART check failed: {e}{RESET}")
             results.append(dev_result)
-        if as_dict:
-            return {"devices": results, **summary}
-        print_header("SMART Disk Health Summary")
+        if not as_dict:
+            print_header("SMART Disk Health Summary")
+        return {"devices": results, **summary}
     except FileNotFoundError:
-        if as_dict:
-            summary["status"] = "no_smartctl"
-            summary["error"] = "smartctl command not found. Please install smartmontools."
-            return {"devices": [], **summary}
-        print(f"{YELLOW}smartctl command not found. Please install smartmontools.{RESET}")
+        summary["status"] = "no_smartctl"
+        summary["error"] = "smartctl command not found. Please install smartmontools."
+        if not as_dict:
+            print(f"{YELLOW}smartctl command not found. Please install smartmontools.{RESET}")
+        return {"devices": [], **summary}
     except Exception as e:
-        if as_dict:
-            summary["status"] = "error"
-            summary["error"] = str(e)
-            return {"devices": [], **summary}
-        print(f"{RED}SMART summary failed: {e}{RESET}")
+        summary["status"] = "error"
+        summary["error"] = str(e)
+        if not as_dict:
+            print(f"{RED}SMART summary failed: {e}{RESET}")
+        return {"devices": [], **summary}
 #!/usr/bin/env python3
 
 import subprocess
@@ -73,6 +99,7 @@ import argparse
 import shutil
 import platform
 import logging
+import functools
 
 # Color control
 def get_colors(enable=True):
@@ -138,6 +165,261 @@ def get_device_origin(mount_point: str):
     except:
         return "unknown", "unknown"
 
+# --- NVMe Health Log ---
+# Native SMART/Health log (Get Log Page 0x02) through the NVMe admin passthrough ioctl,
+# so NVMe drives can be checked without smartctl.
+
+NVME_IOCTL_ADMIN_CMD = 0xC0484E41   # _IOWR('N', 0x41, struct nvme_passthru_cmd)
+NVME_ADMIN_GET_LOG_PAGE = 0x02
+NVME_LOG_SMART = 0x02
+NVME_SMART_LOG_SIZE = 512
+# struct nvme_passthru_cmd: opcode, flags, rsvd1, nsid, cdw2, cdw3, metadata, addr,
+# metadata_len, data_len, cdw10..cdw15, timeout_ms, result (72 bytes)
+NVME_PASSTHRU_FORMAT = "<BBHIIIQQII6III"
+
+NVME_CRITICAL_WARNINGS = (
+    "available spare below threshold",
+    "temperature threshold exceeded",
+    "NVM subsystem reliability degraded",
+    "media placed in read-only mode",
+    "volatile memory backup failed",
+    "persistent memory region read-only",
+)
+
+def decode_nvme_smart_log(data: bytes):
+    """Decode a 512-byte NVMe SMART/Health Information log page (NVMe base spec, log 0x02)."""
+    import struct
+    if len(data) < NVME_SMART_LOG_SIZE:
+        raise ValueError(f"SMART log too short: {len(data)} bytes")
+    crit, temp_k, spare, spare_thresh, used, _ = struct.unpack_from("<BHBBBB", data, 0)
+
+    def u128(offset):
+        return int.from_bytes(data[offset:offset + 16], "little")
+
+    sensors = [t - 273 for t in struct.unpack_from("<8H", data, 200) if t]
+    return {
+        "critical_warning": crit,
+        "critical_warnings": [msg for bit, msg in enumerate(NVME_CRITICAL_WARNINGS) if crit & (1 << bit)],
+        "temperature_c": temp_k - 273 if temp_k else None,
+        "available_spare_pct": spare,
+        "available_spare_threshold_pct": spare_thresh,
+        "percentage_used": used,
+        # Data units are thousands of 512-byte blocks
+        "data_units_read": u128(32),
+        "data_units_written": u128(48),
+        "host_read_commands": u128(64),
+        "host_write_commands": u128(80),
+        "controller_busy_minutes": u128(96),
+        "power_cycles": u128(112),
+        "power_on_hours": u128(128),
+        "unsafe_shutdowns": u128(144),
+        "media_errors": u128(160),
+        "error_log_entries": u128(176),
+        "warning_temp_minutes": struct.unpack_from("<I", data, 192)[0],
+        "critical_temp_minutes": struct.unpack_from("<I", data, 196)[0],
+        "temperature_sensors_c": sensors,
+    }
+
+def read_nvme_smart_log(device: str) -> bytes:
+    """Fetch the raw SMART/Health log page of an NVMe controller or namespace via ioctl."""
+    import ctypes
+    import fcntl
+    import struct
+    buf = ctypes.create_string_buffer(NVME_SMART_LOG_SIZE)
+    numd = NVME_SMART_LOG_SIZE // 4 - 1
+    cmd = bytearray(struct.pack(
+        NVME_PASSTHRU_FORMAT,
+        NVME_ADMIN_GET_LOG_PAGE, 0, 0,
+        0xFFFFFFFF,              # nsid: controller-wide log
+        0, 0, 0,
+        ctypes.addressof(buf),
+        0, NVME_SMART_LOG_SIZE,
+        NVME_LOG_SMART | (numd << 16), 0, 0, 0, 0, 0,
+        0, 0,
+    ))
+    fd = os.open(device, os.O_RDONLY)
+    try:
+        fcntl.ioctl(fd, NVME_IOCTL_ADMIN_CMD, cmd)
+    finally:
+        os.close(fd)
+    return buf.raw
+
+def nvme_controller(device: str) -> str:
+    """/dev/nvme0n1 -> /dev/nvme0"""
+    import re
+    m = re.match(r'(/dev/nvme\d+)(n\d+)?$', device)
+    return m.group(1) if m else device
+
+def nvme_health_attributes(log):
+    """Human readable attribute lines for a decoded SMART log, as listed by check_smart()."""
+    return [
+        f"Critical Warning: 0x{log['critical_warning']:02x}" + (f" ({', '.join(log['critical_warnings'])})" if log['critical_warnings'] else ""),
+        f"Temperature: {log['temperature_c']} C" if log['temperature_c'] is not None else "Temperature: ?",
+        f"Percentage Used: {log['percentage_used']}%",
+        f"Available Spare: {log['available_spare_pct']}% (threshold {log['available_spare_threshold_pct']}%)",
+        f"Media Errors: {log['media_errors']}",
+        f"Unsafe Shutdowns: {log['unsafe_shutdowns']}",
+        f"Power On Hours: {log['power_on_hours']}",
+    ]
+
+# --- Data Providers ---
+# Raw data (lsblk, pacman DB, df, sensors, ...) is fetched through named providers. Each
+# provider runs at most once per run and the result is shared by every check needing it.
+
+PROVIDERS = {}
+
+def register_provider(name: str, func):
+    """Register a data provider. func(ctx) returns the raw data; exceptions propagate to the caller of ctx.get()."""
+    PROVIDERS[name] = func
+    return func
+
+class DataContext:
+    """Lazily computed, memoized provider results for one run (thread-safe)."""
+
+    def __init__(self, root="/"):
+        import threading
+        self.root = root
+        self._values = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+        self._pool = None
+
+    def _lock_for(self, name):
+        import threading
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Return provider data, computing it on first use. A provider failure is re-raised on every get()."""
+        if name not in self._values:
+            with self._lock_for(name):
+                if name not in self._values:
+                    try:
+                        self._values[name] = (PROVIDERS[name](self), None)
+                    except Exception as e:
+                        logging.debug(f"Provider '{name}' failed: {e}")
+                        self._values[name] = (None, e)
+        value, error = self._values[name]
+        if error is not None:
+            raise error
+        return value
+
+    def _prefetch_one(self, name):
+        try:
+            self.get(name)
+        except Exception:
+            pass
+
+    def prefetch(self, names):
+        """Start computing the given providers concurrently in background threads."""
+        from concurrent.futures import ThreadPoolExecutor
+        names = [n for n in dict.fromkeys(names) if n in PROVIDERS and n not in self._values]
+        if not names:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=min(8, len(names)), thread_name_prefix="provider")
+        for name in names:
+            self._pool.submit(self._prefetch_one, name)
+
+    def invalidate(self, *names):
+        """Forget cached provider results so the next get() recomputes them."""
+        for name in names:
+            self._values.pop(name, None)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+# Context of the current run; main() replaces it with a fresh one
+DATA = DataContext()
+
+def root_path(path: str) -> str:
+    """Map an absolute system path into the root being checked (--root), '/' for the running host."""
+    return os.path.join(DATA.root, path.lstrip('/'))
+
+def _pacman_dbpath_args(ctx):
+    """Point pacman at the local database of an offline root."""
+    if ctx.root == "/":
+        return []
+    return ["--dbpath", os.path.join(ctx.root, "var/lib/pacman")]
+
+def _provide_lsblk(ctx):
+    import json
+    out = subprocess.check_output(["lsblk", "-f", "-J"], text=True)
+    logging.debug(f"lsblk -f -J output: {out}")
+    return json.loads(out)["blockdevices"]
+
+def _provide_fstab(ctx):
+    fstab_info = {}
+    try:
+        with open(os.path.join(ctx.root, 'etc/fstab'), 'r') as fstab:
+            for line in fstab:
+                if line.strip() and not line.strip().startswith('#'):
+                    parts = line.split()
+                    if len(parts) > 3:
+                        fstab_info[parts[1]] = parts[3]
+    except Exception as e:
+        logging.debug(f"Failed to parse /etc/fstab: {e}")
+    return fstab_info
+
+def _provide_df(ctx):
+    df_info = {}
+    df_out = subprocess.check_output(["df", "-hP"], text=True)
+    for line in df_out.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 6:
+            df_info[parts[5]] = {"use_percent": parts[4], "avail": parts[3]}
+    return df_info
+
+def _provide_sensors(ctx):
+    return subprocess.check_output(["sensors"], text=True)
+
+def _pacman_list(ctx, *flags):
+    """Package names from a pacman query; pacman exits 1 when the list is empty."""
+    try:
+        out = subprocess.check_output(["pacman", *_pacman_dbpath_args(ctx), *flags], text=True, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        return []
+    return out.split()
+
+def _provide_pacman_packages(ctx):
+    out = _pacman_list(ctx, "-Q")
+    return dict(zip(out[::2], out[1::2]))
+
+def _provide_installed_kernels(ctx):
+    """Kernels installed in the root, from the pkgbase files under /usr/lib/modules."""
+    import glob
+    packages = ctx.get("pacman_packages")
+    kernels = []
+    for path in sorted(glob.glob(os.path.join(ctx.root, "usr/lib/modules/*/pkgbase"))):
+        with open(path, 'r') as f:
+            pkgbase = f.read().strip()
+        kernels.append({"package": pkgbase, "version": packages.get(pkgbase),
+                        "modules": os.path.basename(os.path.dirname(path))})
+    return kernels
+
+def _provide_failed_units(ctx):
+    out = subprocess.check_output(["systemctl", "list-units", "--state=failed", "--plain", "--no-legend"], text=True).strip()
+    return out.splitlines() if out else []
+
+register_provider("lsblk", _provide_lsblk)
+register_provider("fstab", _provide_fstab)
+register_provider("df", _provide_df)
+register_provider("sensors", _provide_sensors)
+register_provider("pacman_packages", _provide_pacman_packages)
+register_provider("pacman_explicit", lambda ctx: _pacman_list(ctx, "-Qqe"))
+register_provider("pacman_deps", lambda ctx: _pacman_list(ctx, "-Qqd"))
+register_provider("pacman_foreign", lambda ctx: _pacman_list(ctx, "-Qqm"))
+register_provider("pacman_orphans", lambda ctx: _pacman_list(ctx, "-Qdtq"))
+register_provider("running_kernel", lambda ctx: platform.release())
+register_provider("installed_kernels", _provide_installed_kernels)
+register_provider("failed_units", _provide_failed_units)
+register_provider("meminfo", lambda ctx: parse_meminfo(read_proc("/proc/meminfo")))
+register_provider("diskstats", lambda ctx: read_diskstats())
+register_provider("boot_time", lambda ctx: boot_time())
+register_provider("btrfs_version", lambda ctx: subprocess.check_output(["btrfs", "--version"], text=True).splitlines()[0])
+
 # --- Main Check Functions ---
 
 def check_sensors(temp_warn: int = 80, as_dict=False):
@@ -145,17 +427,26 @@ def check_sensors(temp_warn: int = 80, as_dict=False):
     global issue_count
     import re
     try:
-        out = subprocess.check_output(["sensors"], text=True)
+        out = DATA.get("sensors")
         lines = out.splitlines()
         sensors = []
         high_found = False
+        chip = None
         for line in lines:
+            if line.strip() and not line[0].isspace() and ":" not in line:
+                # Chip header such as 'coretemp-isa-0000'; sensor labels repeat across chips
+                chip = line.strip()
+                continue
             if "temp" in line.lower() or "core" in line.lower() or "Package id" in line:
                 match = re.search(r'([+-]?[0-9]+\.[0-9])°C', line)
                 if match:
                     temp = float(match.group(1))
+                    label = line.split(":", 1)[0].strip()
                     entry = {
-                        "label": line.strip(),
+                        "name": f"{chip}/{label}" if chip else label,
+                        "chip": chip,
+                        "label": label,
+                        "line": line.strip(),
                         "temp": temp,
                         "warn": temp >= temp_warn,
                         "color": "red" if temp >= temp_warn else ("yellow" if temp >= temp_warn-10 else "green")
@@ -166,28 +457,30 @@ def check_sensors(temp_warn: int = 80, as_dict=False):
                         print(f"{color}{line.strip()}{RESET}")
                     if temp >= temp_warn:
                         high_found = True
+        result = {
+            "sensors": sensors,
+            "count": len(sensors),
+            "high_temp": high_found,
+            "status": "warn" if high_found else "ok",
+            "issues": 1 if high_found else 0
+        }
         if as_dict:
-            return {
-                "sensors": sensors,
-                "count": len(sensors),
-                "high_temp": high_found,
-                "status": "warn" if high_found else "ok",
-                "issues": 1 if high_found else 0
-            }
+            return result
         print_header("Temperature & Sensors")
         if high_found:
             print(f"{RED}{BOLD}Warning: High temperature detected!{RESET}")
             issue_count += 1
         if not lines:
             print(f"{YELLOW}No sensor data found. Is lm_sensors installed and configured?{RESET}")
+        return result
     except FileNotFoundError:
-        if as_dict:
-            return {"sensors": [], "count": 0, "high_temp": False, "status": "no_sensors", "issues": 0, "error": "sensors command not found"}
-        print(f"{YELLOW}sensors command not found. Please install lm_sensors.{RESET}")
+        if not as_dict:
+            print(f"{YELLOW}sensors command not found. Please install lm_sensors.{RESET}")
+        return {"sensors": [], "count": 0, "high_temp": False, "status": "no_sensors", "issues": 0, "error": "sensors command not found"}
     except Exception as e:
-        if as_dict:
-            return {"sensors": [], "count": 0, "high_temp": False, "status": "error", "issues": 0, "error": str(e)}
-        print(f"{RED}Sensor check failed: {e}{RESET}")
+        if not as_dict:
+            print(f"{RED}Sensor check failed: {e}{RESET}")
+        return {"sensors": [], "count": 0, "high_temp": False, "status": "error", "issues": 0, "error": str(e)}
 
 def print_logo_info():
     # Gather System Info
@@ -206,11 +499,10 @@ def print_logo_info():
     except: info['CPU'] = "Unknown"
 
     try:
-        with open('/proc/meminfo', 'r') as f:
-            lines = f.readlines()
-            total = int(lines[0].split()[1]) // 1024
-            avail = int(lines[2].split()[1]) // 1024
-            info['Memory'] = f"{total - avail}MiB / {total}MiB"
+        mem = DATA.get("meminfo")
+        total = mem["MemTotal"] // 1024
+        avail = mem["MemAvailable"] // 1024
+        info['Memory'] = f"{total - avail}MiB / {total}MiB"
     except: info['Memory'] = "Unknown"
 
     data_lines = [
@@ -229,8 +521,118 @@ def print_logo_info():
         text = data_lines[i] if i < len(data_lines) else ""
         print(f" {logo}   {text}")
 
-def check_disk(as_dict=False):
-    """Show disk usage, filesystem, device, and origin info for key mounts. Uses lsblk -f -J and /etc/fstab."""
+def human_bytes(n) -> str:
+    """Format a byte count with binary units (e.g. 1.5G)."""
+    n = float(n)
+    for unit in ("B", "K", "M", "G", "T"):
+        if abs(n) < 1024 or unit == "T":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+def analyze_space(mount: str, top_n: int = 10, time_budget: float = 30.0, jobs=None):
+    """Find what fills a mount: largest files, directories and top-level subtrees.
+
+    Directories are scanned in parallel with os.scandir worker threads. The walk stays on
+    the mount's filesystem (st_dev), counts hardlinked inodes once and only keeps bounded
+    top-N heaps, so memory does not grow with the size of the tree. When time_budget
+    (seconds) runs out the partial result is returned with "truncated": True.
+    """
+    import heapq
+    import time
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    dev = os.lstat(mount).st_dev
+
+    def scan(path):
+        own, files, subdirs, links, errors = 0, [], [], [], 0
+        try:
+            with os.scandir(path) as it:
+                for de in it:
+                    try:
+                        st = de.stat(follow_symlinks=False)
+                    except OSError:
+                        errors += 1
+                        continue
+                    if st.st_dev != dev:
+                        continue
+                    if de.is_dir(follow_symlinks=False):
+                        subdirs.append(de.path)
+                        continue
+                    size = st.st_blocks * 512
+                    if st.st_nlink > 1:
+                        links.append((st.st_ino, size, de.path))
+                    else:
+                        own += size
+                        files.append((size, de.path))
+        except OSError:
+            errors += 1
+        return path, own, heapq.nlargest(top_n, files), subdirs, links, errors
+
+    def push(heap, item):
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    top_files, top_dirs = [], []
+    subtrees = {}
+    seen_links = set()
+    total = scanned = errors = 0
+    truncated = False
+    start = time.monotonic()
+    deadline = start + time_budget
+    workers = jobs or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan, mount)}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                truncated = True
+                for fut in pending:
+                    fut.cancel()
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path, own, files, subdirs, links, errs = fut.result()
+                for ino, size, link_path in links:
+                    if ino in seen_links:
+                        continue
+                    seen_links.add(ino)
+                    own += size
+                    files.append((size, link_path))
+                for item in files:
+                    push(top_files, item)
+                push(top_dirs, (own, path))
+                rel = os.path.relpath(path, mount)
+                top = mount if rel == '.' else os.path.join(mount, rel.split(os.sep, 1)[0])
+                subtrees[top] = subtrees.get(top, 0) + own
+                total += own
+                scanned += 1
+                errors += errs
+                for sub in subdirs:
+                    pending.add(pool.submit(scan, sub))
+
+    def as_list(items):
+        return [{"path": p, "bytes": b} for b, p in sorted(items, reverse=True)]
+    return {
+        "mount": mount,
+        "total_bytes": total,
+        "scanned_dirs": scanned,
+        "errors": errors,
+        "elapsed_s": round(time.monotonic() - start, 2),
+        "truncated": truncated,
+        "largest_subtrees": as_list(heapq.nlargest(top_n, ((b, p) for p, b in subtrees.items()))),
+        "largest_dirs": as_list(top_dirs),
+        "largest_files": as_list(top_files),
+    }
+
+def check_disk(as_dict=False, drill_down=False, top_n=10, time_budget=30.0, mounts=None, watch=False):
+    """Show disk usage, filesystem, device, and origin info for key mounts. Uses lsblk -f -J and /etc/fstab.
+
+    With drill_down, mounts flagged critical are scanned by analyze_space() and the result is
+    attached to the mount entry as "space_hogs". mounts restricts the result to the given
+    mount points. With watch, hand over to watch_disk() and keep the table up to date.
+    """
     import json
     import shutil
     import subprocess
@@ -238,29 +640,19 @@ def check_disk(as_dict=False):
     global issue_count
 
     import logging
+    if watch:
+        return watch_disk(as_dict=as_dict, drill_down=drill_down, top_n=top_n, time_budget=time_budget)
     try:
-        lsblk_out = subprocess.check_output(["lsblk", "-f", "-J"], text=True)
-        logging.debug(f"lsblk -f -J output: {lsblk_out}")
-        blkinfo = json.loads(lsblk_out)["blockdevices"]
+        blkinfo = DATA.get("lsblk")
         logging.debug(f"Parsed blkinfo: {blkinfo}")
     except Exception as e:
-        if as_dict:
-            return {"error": f"lsblk failed: {e}", "status": "error", "issues": 1}
-        print(f"{RED}lsblk failed: {e}{RESET}")
-        return
+        if not as_dict:
+            print(f"{RED}lsblk failed: {e}{RESET}")
+        return {"error": f"lsblk failed: {e}", "status": "error", "issues": 1}
 
     # Parse /etc/fstab for subvolumes and mount options
-    fstab_info = {}
-    try:
-        with open('/etc/fstab', 'r') as fstab:
-            for line in fstab:
-                if line.strip() and not line.strip().startswith('#'):
-                    parts = line.split()
-                    if len(parts) > 3:
-                        fstab_info[parts[1]] = parts[3]
-        logging.debug(f"fstab_info: {fstab_info}")
-    except Exception as e:
-        logging.debug(f"Failed to parse /etc/fstab: {e}")
+    fstab_info = DATA.get("fstab")
+    logging.debug(f"fstab_info: {fstab_info}")
 
     # Gather all mountpoints from lsblk and fstab
     def collect_mountpoints_from_lsblk(devs):
@@ -282,6 +674,8 @@ def check_disk(as_dict=False):
 
     # Union of all mountpoints, sorted for display
     all_mounts = sorted(lsblk_mounts | fstab_mounts)
+    if mounts is not None:
+        all_mounts = [m for m in all_mounts if m in mounts]
 
     results = []
     def find_mount_and_chain(devs, mount, chain=None):
@@ -306,18 +700,10 @@ def check_disk(as_dict=False):
     skip_mounts = {'[SWAP]', 'none', ''}
 
     # Parse df -h output for all mounts
-    df_info = {}
     try:
-        df_out = subprocess.check_output(["df", "-hP"], text=True)
-        for line in df_out.splitlines()[1:]:
-            parts = line.split()
-            if len(parts) >= 6:
-                mp = parts[5]
-                df_info[mp] = {
-                    "use_percent": parts[4],
-                    "avail": parts[3]
-                }
+        df_info = DATA.get("df")
     except Exception as e:
+        df_info = {}
         logging.debug(f"Failed to parse df -h: {e}")
 
     for mount in all_mounts:
@@ -432,7 +818,7 @@ def check_disk(as_dict=False):
             # For btrfs, if lsblk didn't provide a useful type, show the btrfs-progs version
             if fstype == "btrfs" and (not entry.get("type") or entry.get("type") == "?"):
                 try:
-                    bv = subprocess.check_output(["btrfs", "--version"], text=True).splitlines()[0]
+                    bv = DATA.get("btrfs_version")
                     # Typical output: 'btrfs-progs v5.15.1' -> show version number
                     parts = bv.split()
                     entry["type"] = parts[1] if len(parts) > 1 else bv
@@ -492,10 +878,16 @@ def check_disk(as_dict=False):
             entry["status"] = "error"
             entry["error"] = str(e)
             logging.debug(f"Error processing mount '{mount}': {e}")
+        if drill_down and entry.get("status") == "critical":
+            try:
+                entry["space_hogs"] = analyze_space(mount, top_n=top_n, time_budget=time_budget)
+            except Exception as e:
+                entry["space_hogs"] = {"mount": mount, "error": str(e)}
         results.append(entry)
 
+    summary = {"mounts": results, "status": "ok", "issues": sum(1 for e in results if e.get("status") == "critical")}
     if as_dict:
-        return {"mounts": results, "status": "ok", "issues": sum(1 for e in results if e.get("status") == "critical")}
+        return summary
     # Only show the compact Btrfs used/total column when we actually have btrfs mounts
     show_btrfs = any((e.get('fstype') == 'btrfs') or (e.get('btrfs_device_size_bytes') is not None) for e in results)
     print_header("Disk Usage & Origins")
@@ -526,14 +918,31 @@ def check_disk(as_dict=False):
         else:
             print(f"{safe(entry['mount']):<15} : {color}{safe(entry.get('usage_percent')):>6}%{RESET} : {safe(entry.get('free_gb')):>7} GB : {safe(entry.get('fstype')):<8} : {safe(entry.get('type')):<10} : {safe(entry.get('device')):<22} : {safe(entry.get('origin')):<36}")
 
+    for entry in results:
+        hogs = entry.get("space_hogs")
+        if not hogs:
+            continue
+        print_header(f"Space Hogs: {entry['mount']}")
+        if hogs.get("error"):
+            print(f"{RED}Scan failed: {hogs['error']}{RESET}")
+            continue
+        note = f" {YELLOW}(time budget exhausted, partial){RESET}" if hogs["truncated"] else ""
+        print(f"Scanned {hogs['scanned_dirs']} dirs, {human_bytes(hogs['total_bytes'])} in {hogs['elapsed_s']}s{note}")
+        for title, key in (("Largest subtrees", "largest_subtrees"), ("Largest directories (own files)", "largest_dirs"), ("Largest files", "largest_files")):
+            print(f"{BOLD}{title}:{RESET}")
+            for item in hogs[key]:
+                print(f"  {human_bytes(item['bytes']):>8}  {item['path']}")
+    return summary
+
 def check_kernel():
     global issue_count
-    def _kernel_dict(installed, running, mismatch, details=None, error=None):
+    def _kernel_dict(installed, running, mismatch, details=None, error=None, kernels=None):
         return {
             "installed": installed,
             "running": running,
             "mismatch": mismatch,
             "details": details or [],
+            "kernels": kernels or [],
             "error": error,
             "status": "mismatch" if mismatch else "ok",
             "issues": 1 if mismatch else 0
@@ -548,11 +957,26 @@ def check_kernel():
     def _labels():
         return ['Major', 'Minor', 'Patch', 'Arch Rel']
 
+    def _offline_kernels(as_dict):
+        # An offline root has no running kernel: just report what is installed
+        kernels = DATA.get("installed_kernels")
+        installed = DATA.get("pacman_packages").get("linux")
+        result = _kernel_dict(installed, None, False, kernels=kernels)
+        if as_dict:
+            return result
+        print_header("Installed Kernels")
+        if not kernels:
+            print(f"{YELLOW}No kernel modules found under /usr/lib/modules.{RESET}")
+        for k in kernels:
+            print(f"{k['package']:<16} : {k['version'] or '?':<20} : {k['modules']}")
+        return result
+
     def check_kernel_inner(as_dict=False):
         try:
-            pac_out = subprocess.check_output(["pacman", "-Qi", "linux"], text=True)
-            installed = next(l.split(":")[1].strip() for l in pac_out.splitlines() if l.startswith("Version"))
-            running = subprocess.check_output(["uname", "-r"], text=True).strip()
+            if DATA.root != "/":
+                return _offline_kernels(as_dict)
+            installed = DATA.get("pacman_packages")["linux"]
+            running = DATA.get("running_kernel")
             p_v, r_v = _parse_versions(installed, running)
             mismatch = False
             details = []
@@ -560,8 +984,13 @@ def check_kernel():
                 if p != r:
                     mismatch = True
                 details.append({"component": lbl, "installed": p, "running": r, "match": p == r})
+            try:
+                kernels = DATA.get("installed_kernels")
+            except Exception:
+                kernels = []
+            result = _kernel_dict(installed, running, mismatch, details=details, kernels=kernels)
             if as_dict:
-                return _kernel_dict(installed, running, mismatch, details=details)
+                return result
             print_header("Kernel Version Check")
             print(f"{'Component':<12} : {'Installed':<12} : {'Running'}")
             print("─" * 45)
@@ -572,23 +1001,24 @@ def check_kernel():
             if mismatch:
                 issue_count += 1
                 print(f"\n{RED}{BOLD}![REBOOT REQUIRED]: Running kernel mismatch.{RESET}")
+            return result
         except Exception as e:
-            if as_dict:
-                return _kernel_dict(None, None, True, error=str(e))
-            print(f"{RED}Kernel check failed.{RESET}")
+            if not as_dict:
+                print(f"{RED}Kernel check failed.{RESET}")
+            return _kernel_dict(None, None, True, error=str(e))
     return check_kernel_inner
 
 
 def check_pacnew(as_dict=False):
     global issue_count
-    found = [os.path.join(r, f) for r, _, fs in os.walk('/etc') for f in fs if f.endswith(('.pacnew', '.pacsave'))]
+    found = [os.path.join(r, f) for r, _, fs in os.walk(root_path('/etc')) for f in fs if f.endswith(('.pacnew', '.pacsave'))]
+    result = {
+        "files": found,
+        "count": len(found),
+        "status": "pending" if found else "ok",
+        "issues": len(found) if found else 0
+    }
     if as_dict:
-        result = {
-            "files": found,
-            "count": len(found),
-            "status": "pending" if found else "ok",
-            "issues": len(found) if found else 0
-        }
         return result
     print_header("Config Files (.pacnew/.pacsave)")
     if found:
@@ -597,72 +1027,63 @@ def check_pacnew(as_dict=False):
             print(f"{YELLOW}  -> {f}{RESET}")
     else:
         print(f"{GREEN}No pending merges.{RESET}")
+    return result
 
 def check_failed_services(as_dict=False):
     global issue_count
     try:
-        out = subprocess.check_output(["systemctl", "list-units", "--state=failed", "--plain", "--no-legend"], text=True).strip()
-        if out:
-            lines = out.splitlines()
-            if as_dict:
-                return {
-                    "failed_services": [line.split()[0] for line in lines],
-                    "count": len(lines),
-                    "status": "failed",
-                    "issues": len(lines)
-                }
+        lines = DATA.get("failed_units")
+        result = {
+            "failed_services": [line.split()[0] for line in lines],
+            "count": len(lines),
+            "status": "failed" if lines else "ok",
+            "issues": len(lines)
+        }
+        if as_dict:
+            return result
+        print_header("Failed Services")
+        if lines:
             issue_count += len(lines)
-            print_header("Failed Services")
             for line in lines:
                 print(f"{RED}  -> {line.split()[0]}{RESET}")
         else:
-            if as_dict:
-                return {"failed_services": [], "count": 0, "status": "ok", "issues": 0}
-            print_header("Failed Services")
             print(f"{GREEN}All units OK.{RESET}")
+        return result
     except Exception as e:
-        if as_dict:
-            return {"failed_services": [], "count": 0, "status": "error", "issues": 0, "error": str(e)}
-        pass
+        return {"failed_services": [], "count": 0, "status": "error", "issues": 0, "error": str(e)}
 
 def check_orphans(as_dict=False):
     try:
-        out = subprocess.check_output(["pacman", "-Qdtq"], text=True).strip()
+        orphans = DATA.get("pacman_orphans")
+        result = {
+            "orphans": orphans,
+            "count": len(orphans),
+            "status": "found" if orphans else "ok",
+            "issues": len(orphans)
+        }
         if as_dict:
-            orphans = out.splitlines() if out else []
-            return {
-                "orphans": orphans,
-                "count": len(orphans),
-                "status": "found" if orphans else "ok",
-                "issues": len(orphans)
-            }
+            return result
         print_header("Orphaned Packages")
-        if out:
-            print(f"{YELLOW}Orphans: {out.replace(chr(10), ', ')}{RESET}")
+        if orphans:
+            print(f"{YELLOW}Orphans: {', '.join(orphans)}{RESET}")
         else:
             print(f"{GREEN}No orphans.{RESET}")
+        return result
     except Exception as e:
-        if as_dict:
-            return {"orphans": [], "count": 0, "status": "ok", "issues": 0, "error": str(e)}
-        print(f"{GREEN}No orphans.{RESET}")
+        if not as_dict:
+            print(f"{GREEN}No orphans.{RESET}")
+        return {"orphans": [], "count": 0, "status": "ok", "issues": 0, "error": str(e)}
 
 def check_stats(as_dict=False):
     try:
-        def get_count(flags: str) -> int:
-            try:
-                out = subprocess.check_output(["pacman"] + flags.split(), text=True, stderr=subprocess.DEVNULL)
-                return len(out.strip().splitlines())
-            except subprocess.CalledProcessError:
-                return 0
-
-        total = get_count("-Q")
-        explicit = get_count("-Qe")
-        deps = get_count("-Qd")
-        foreign = get_count("-Qm")
+        total = len(DATA.get("pacman_packages"))
+        explicit = len(DATA.get("pacman_explicit"))
+        deps = len(DATA.get("pacman_deps"))
+        foreign = len(DATA.get("pacman_foreign"))
         native = total - foreign
 
         # Calculate Pacman Cache Size
-        cache_path = "/var/cache/pacman/pkg"
+        cache_path = root_path("/var/cache/pacman/pkg")
         cache_size_str = "Unknown"
         if os.path.exists(cache_path):
             try:
@@ -676,17 +1097,18 @@ def check_stats(as_dict=False):
             except Exception:
                 cache_size_str = "Unknown (run with sudo to read /var/cache/pacman/pkg/ with du)"
 
+        result = {
+            "total": total,
+            "native": native,
+            "foreign": foreign,
+            "explicit": explicit,
+            "dependencies": deps,
+            "cache_size": cache_size_str,
+            "status": "ok",
+            "issues": 0
+        }
         if as_dict:
-            return {
-                "total": total,
-                "native": native,
-                "foreign": foreign,
-                "explicit": explicit,
-                "dependencies": deps,
-                "cache_size": cache_size_str,
-                "status": "ok",
-                "issues": 0
-            }
+            return result
         print_header("Pacman Statistics")
         print(f"{BOLD}{'Category':<18} : {'Count/Size'}{RESET}")
         print("─" * 35)
@@ -698,16 +1120,1620 @@ def check_stats(as_dict=False):
         print(f"{'As Dependencies':<18} : {deps}")
         print("-" * 35)
         print(f"{'Pacman Cache Size':<18} : {YELLOW}{cache_size_str}{RESET}")
+        return result
+    except Exception as e:
+        if not as_dict:
+            print(f"{RED}Could not retrieve stats: {e}{RESET}")
+        return {"status": "error", "issues": 0, "error": str(e)}
+
+# --- Memory, CPU & Pressure ---
+
+# Warn thresholds for check_resources(); PSI values are avg10 percentages
+RESOURCE_THRESHOLDS = {
+    "mem_available_pct": 10.0,   # warn below
+    "swap_used_pct": 80.0,
+    "load_per_cpu": 2.0,
+    "psi_cpu_some": 50.0,
+    "psi_memory_some": 10.0,
+    "psi_memory_full": 5.0,
+    "psi_io_some": 30.0,
+    "psi_io_full": 10.0,
+}
+
+def read_proc(path: str, size: int = 65536) -> str:
+    """Read a small procfs/sysfs file with a single os.read() call."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, size).decode()
+    finally:
+        os.close(fd)
+
+def parse_meminfo(text: str):
+    """Parse /proc/meminfo into {key: kB} by field name, independent of line order."""
+    info = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(':')
+        parts = rest.split()
+        if parts:
+            try:
+                info[key.strip()] = int(parts[0])
+            except ValueError:
+                pass
+    return info
+
+def parse_psi(text: str):
+    """Parse a /proc/pressure/* file into {"some": {...}, "full": {...}}."""
+    psi = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        values = {}
+        for kv in parts[1:]:
+            k, _, v = kv.partition('=')
+            values[k] = int(v) if k == "total" else float(v)
+        psi[parts[0]] = values
+    return psi
+
+def parse_loadavg(text: str):
+    parts = text.split()
+    running, _, total = parts[3].partition('/')
+    return {"load1": float(parts[0]), "load5": float(parts[1]), "load15": float(parts[2]),
+            "running": int(running), "tasks": int(total)}
+
+def read_zram():
+    """Return size and compression stats for every /sys/block/zram* device."""
+    import glob
+    devices = []
+    for path in sorted(glob.glob('/sys/block/zram*')):
+        try:
+            disksize = int(read_proc(os.path.join(path, 'disksize')))
+            if not disksize:
+                continue
+            # mm_stat: orig_data_size compr_data_size mem_used_total mem_limit mem_used_max same_pages ...
+            mm = [int(x) for x in read_proc(os.path.join(path, 'mm_stat')).split()]
+        except (OSError, ValueError):
+            continue
+        devices.append({
+            "device": os.path.basename(path),
+            "disksize_bytes": disksize,
+            "orig_data_bytes": mm[0],
+            "compr_data_bytes": mm[1],
+            "mem_used_bytes": mm[2],
+            "ratio": round(mm[0] / mm[1], 2) if mm[1] else None,
+        })
+    return devices
+
+class ResourceSampler:
+    """Low-overhead sampler for meminfo, loadavg and PSI.
+
+    The proc files stay open and each sample reads every file with a single
+    os.pread() at offset 0. Samples go into a fixed-size ring buffer.
+    """
+
+    FILES = {
+        "meminfo": "/proc/meminfo",
+        "loadavg": "/proc/loadavg",
+        "cpu": "/proc/pressure/cpu",
+        "memory": "/proc/pressure/memory",
+        "io": "/proc/pressure/io",
+    }
+
+    def __init__(self, maxlen: int = 60):
+        from collections import deque
+        self.samples = deque(maxlen=maxlen)
+        self._fds = {}
+        for key, path in self.FILES.items():
+            try:
+                self._fds[key] = os.open(path, os.O_RDONLY)
+            except OSError:
+                # PSI needs CONFIG_PSI and may be disabled (psi=0)
+                logging.debug(f"Cannot open {path}")
+
+    def _read(self, key):
+        fd = self._fds.get(key)
+        return os.pread(fd, 65536, 0).decode() if fd is not None else None
+
+    def sample(self):
+        import time
+        mem = parse_meminfo(self._read("meminfo") or "")
+        load = self._read("loadavg")
+        psi = {}
+        for key in ("cpu", "memory", "io"):
+            text = self._read(key)
+            if text is not None:
+                psi[key] = parse_psi(text)
+        total = mem.get("MemTotal", 0)
+        avail = mem.get("MemAvailable", mem.get("MemFree", 0))
+        swap_total = mem.get("SwapTotal", 0)
+        swap_used = swap_total - mem.get("SwapFree", 0)
+        sample = {
+            "time": time.time(),
+            "mem_total_kb": total,
+            "mem_available_kb": avail,
+            "mem_used_pct": round((total - avail) / total * 100, 1) if total else None,
+            "swap_total_kb": swap_total,
+            "swap_used_kb": swap_used,
+            "swap_used_pct": round(swap_used / swap_total * 100, 1) if swap_total else 0.0,
+            "loadavg": parse_loadavg(load) if load else None,
+            "psi": psi,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+
+def evaluate_resources(sample, thresholds=None):
+    """Return the list of threshold warnings for one sampler sample."""
+    t = dict(RESOURCE_THRESHOLDS, **(thresholds or {}))
+    warnings = []
+    if sample["mem_total_kb"]:
+        avail_pct = sample["mem_available_kb"] / sample["mem_total_kb"] * 100
+        if avail_pct < t["mem_available_pct"]:
+            warnings.append(f"Low memory: {avail_pct:.1f}% available")
+    if sample["swap_used_pct"] > t["swap_used_pct"]:
+        warnings.append(f"Swap {sample['swap_used_pct']}% used")
+    load = sample["loadavg"]
+    ncpu = os.cpu_count() or 1
+    if load and load["load5"] / ncpu > t["load_per_cpu"]:
+        warnings.append(f"Load {load['load5']} over {ncpu} CPUs")
+    for res in ("cpu", "memory", "io"):
+        for kind in ("some", "full"):
+            limit = t.get(f"psi_{res}_{kind}")
+            value = sample["psi"].get(res, {}).get(kind, {}).get("avg10")
+            if limit is not None and value is not None and value > limit:
+                warnings.append(f"{res} pressure ({kind}) avg10={value}%")
+    return warnings
+
+def _resource_history(samples):
+    """min/max/avg of the main metrics over the ring buffer."""
+    metrics = {
+        "mem_used_pct": lambda s: s["mem_used_pct"],
+        "swap_used_pct": lambda s: s["swap_used_pct"],
+        "load1": lambda s: s["loadavg"]["load1"] if s["loadavg"] else None,
+        "psi_cpu_some_avg10": lambda s: s["psi"].get("cpu", {}).get("some", {}).get("avg10"),
+        "psi_memory_some_avg10": lambda s: s["psi"].get("memory", {}).get("some", {}).get("avg10"),
+        "psi_io_some_avg10": lambda s: s["psi"].get("io", {}).get("some", {}).get("avg10"),
+    }
+    history = {"samples": len(samples)}
+    for name, get in metrics.items():
+        values = [v for v in map(get, samples) if v is not None]
+        if values:
+            history[name] = {"min": min(values), "max": max(values), "avg": round(sum(values) / len(values), 2)}
+    return history
+
+def check_resources(as_dict=False, watch=None, samples=60, count=None):
+    """Memory, swap, zram, load average and pressure-stall (PSI) check.
+
+    With watch (seconds) the sampler keeps polling until interrupted (or count samples),
+    printing one line per sample; the summary then includes min/max/avg over the last
+    `samples` samples.
+    """
+    global issue_count
+    import time
+    sampler = ResourceSampler(maxlen=samples)
+    try:
+        sample = sampler.sample()
+        if watch:
+            if not as_dict:
+                print_header("Resource Watch")
+                print(f"{BOLD}{'Time':<8} : {'Mem':>6} : {'Swap':>6} : {'Load1':>6} : {'PSI cpu':>7} : {'PSI mem':>7} : {'PSI io':>7}{RESET}")
+            try:
+                n = 1
+                while True:
+                    if not as_dict:
+                        psi = sample["psi"]
+                        cols = [psi.get(r, {}).get("some", {}).get("avg10", "-") for r in ("cpu", "memory", "io")]
+                        color = YELLOW if evaluate_resources(sample) else GREEN
+                        load1 = sample["loadavg"]["load1"] if sample["loadavg"] else "-"
+                        print(f"{color}{time.strftime('%H:%M:%S'):<8} : {sample['mem_used_pct']:>5}% : {sample['swap_used_pct']:>5}% : "
+                              f"{load1:>6} : {cols[0]:>7} : {cols[1]:>7} : {cols[2]:>7}{RESET}", flush=True)
+                    if count and n >= count:
+                        break
+                    time.sleep(watch)
+                    sample = sampler.sample()
+                    n += 1
+            except KeyboardInterrupt:
+                pass
+        history = _resource_history(sampler.samples)
     except Exception as e:
+        if not as_dict:
+            print(f"{RED}Resource check failed: {e}{RESET}")
+        return {"status": "error", "issues": 0, "error": str(e)}
+    finally:
+        sampler.close()
+
+    warnings = evaluate_resources(sample)
+    zram = read_zram()
+    result = {
+        "memory": {"total_mib": sample["mem_total_kb"] // 1024, "available_mib": sample["mem_available_kb"] // 1024,
+                   "used_pct": sample["mem_used_pct"]},
+        "swap": {"total_mib": sample["swap_total_kb"] // 1024, "used_mib": sample["swap_used_kb"] // 1024,
+                 "used_pct": sample["swap_used_pct"]},
+        "zram": zram,
+        "loadavg": sample["loadavg"],
+        "cpus": os.cpu_count(),
+        "psi": sample["psi"],
+        "warnings": warnings,
+        "status": "warn" if warnings else "ok",
+        "issues": len(warnings),
+    }
+    if watch:
+        result["history"] = history
+    if as_dict:
+        return result
+
+    print_header("Memory, CPU & Pressure")
+    mem, swap, load = result["memory"], result["swap"], result["loadavg"]
+    print(f"{'Memory':<10} : {mem['total_mib'] - mem['available_mib']}MiB / {mem['total_mib']}MiB ({mem['used_pct']}%)")
+    print(f"{'Swap':<10} : {swap['used_mib']}MiB / {swap['total_mib']}MiB ({swap['used_pct']}%)")
+    for z in zram:
+        ratio = f"{z['ratio']}x" if z["ratio"] else "-"
+        print(f"{'  ' + z['device']:<10} : {human_bytes(z['orig_data_bytes'])} -> {human_bytes(z['compr_data_bytes'])} ({ratio}) of {human_bytes(z['disksize_bytes'])}")
+    if load:
+        print(f"{'Load':<10} : {load['load1']} {load['load5']} {load['load15']} ({result['cpus']} CPUs)")
+    for res in ("cpu", "memory", "io"):
+        if res in result["psi"]:
+            line = "  ".join(f"{kind} {v['avg10']}/{v['avg60']}/{v['avg300']}" for kind, v in result["psi"][res].items())
+            print(f"{'PSI ' + res:<10} : {line}")
+    if not result["psi"]:
+        print(f"{YELLOW}Pressure stall information not available (kernel built without PSI or psi=0).{RESET}")
+    for w in warnings:
+        print(f"{YELLOW}Warning: {w}{RESET}")
+    issue_count += len(warnings)
+    return result
+
+# --- Disk Watch ---
+# Long-running --disk mode: the mount table is polled for POLLPRI (the kernel flags
+# /proc/self/mountinfo on every mount/umount) and block hotplug arrives on a
+# NETLINK_KOBJECT_UEVENT socket. Between events the process sleeps in poll().
+
+NETLINK_KOBJECT_UEVENT = 15   # linux/netlink.h; not exported by the socket module
+
+def _unescape_mountinfo(field: str) -> str:
+    import re
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), field)
+
+def read_mountinfo(fd: int):
+    """Re-read an open /proc/self/mountinfo: {mount point: (major:minor, root, fstype, source)}."""
+    os.lseek(fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    mounts = {}
+    for line in b"".join(chunks).decode(errors="replace").splitlines():
+        pre, _, post = line.partition(" - ")
+        f, g = pre.split(), post.split()
+        if len(f) >= 5 and len(g) >= 2:
+            mounts[_unescape_mountinfo(f[4])] = (f[2], f[3], g[0], g[1])
+    return mounts
+
+def parse_uevent(data: bytes):
+    """Parse a kernel uevent datagram ('action@devpath' then NUL-separated KEY=VALUE pairs) into a dict."""
+    parts = data.split(b"\0")
+    event = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b"=")
+        if sep:
+            event[key.decode(errors="replace")] = value.decode(errors="replace")
+    return event
+
+def _disk_event_line(mount, entry):
+    if entry is None:
+        return f"{RED}- {mount} (gone){RESET}"
+    color = GREEN if entry.get("status") == "ok" else (YELLOW if entry.get("status") == "warn" else RED)
+    return (f"{color}~ {mount:<15} : {entry.get('usage_percent')}% : {entry.get('free_gb')} GB : "
+            f"{entry.get('fstype')} : {entry.get('device')} : {entry.get('origin')}{RESET}")
+
+def watch_disk(as_dict=False, drill_down=False, top_n=10, time_budget=30.0):
+    """Keep the disk table current, refreshing only the mounts touched by mount or hotplug events.
+
+    Text mode prints the full table once, then one line per changed mount. With as_dict
+    every update is printed as a JSON line and the final state is returned on Ctrl-C.
+    """
+    import json
+    import select
+    import socket
+    import time
+    opts = {"drill_down": drill_down, "top_n": top_n, "time_budget": time_budget}
+    # One full run seeds the state; text mode prints the table from the same run
+    initial = check_disk(as_dict=as_dict, **opts) or {}
+    if not as_dict:
+        print(f"\n{BOLD}Watching mounts and block devices (Ctrl-C to stop)...{RESET}", flush=True)
+    state = {e["mount"]: e for e in initial.get("mounts", [])}
+
+    def refresh(mounts, reason):
+        if not mounts:
+            return
+        DATA.invalidate("lsblk", "df")
+        fresh = {e["mount"]: e for e in check_disk(as_dict=True, mounts=set(mounts), **opts).get("mounts", [])}
+        changed = {}
+        for mount in sorted(mounts):
+            new = fresh.get(mount)
+            if new != state.get(mount):
+                changed[mount] = new
+                if new is None:
+                    state.pop(mount, None)
+                else:
+                    state[mount] = new
+        if not changed:
+            return
         if as_dict:
-            return {"status": "error", "issues": 0, "error": str(e)}
-        print(f"{RED}Could not retrieve stats: {e}{RESET}")
+            print(json.dumps({"time": time.time(), "event": reason, "changed": changed}), flush=True)
+        else:
+            print(f"{CYAN}[{time.strftime('%H:%M:%S')}] {reason}{RESET}")
+            for mount, entry in changed.items():
+                print(_disk_event_line(mount, entry), flush=True)
+
+    mfd = os.open("/proc/self/mountinfo", os.O_RDONLY)
+    mounts = read_mountinfo(mfd)
+    poller = select.poll()
+    poller.register(mfd, select.POLLPRI | select.POLLERR)
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        sock.bind((0, 1))   # multicast group 1: kernel uevents
+        poller.register(sock.fileno(), select.POLLIN)
+    except OSError as e:
+        logging.warning(f"Block device hotplug events unavailable: {e}")
+        sock = None
+    try:
+        while True:
+            for fd, _ in poller.poll():
+                if fd == mfd:
+                    new_mounts = read_mountinfo(mfd)
+                    touched = {m for m in set(mounts) | set(new_mounts) if mounts.get(m) != new_mounts.get(m)}
+                    mounts = new_mounts
+                    refresh(touched, "mount table changed")
+                elif sock is not None and fd == sock.fileno():
+                    event = parse_uevent(sock.recv(65536))
+                    if event.get("SUBSYSTEM") != "block" or "DEVNAME" not in event:
+                        continue
+                    kname = os.path.basename(event["DEVNAME"])
+                    name = _kernel_to_lsblk_name(kname)
+                    touched = {m for m, e in state.items()
+                               if e.get("device") in (f"/dev/{kname}", f"/dev/{name}") or name in str(e.get("origin", "")).split(".")}
+                    reason = f"block {event.get('ACTION', '?')} {kname}"
+                    if touched:
+                        refresh(touched, reason)
+                    elif as_dict:
+                        print(json.dumps({"time": time.time(), "event": reason, "changed": {}}), flush=True)
+                    else:
+                        print(f"{CYAN}[{time.strftime('%H:%M:%S')}] {reason}{RESET}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(mfd)
+        if sock is not None:
+            sock.close()
+    mounts_list = [state[m] for m in sorted(state)]
+    return {"mounts": mounts_list, "status": "ok", "issues": sum(1 for e in mounts_list if e.get("status") == "critical")}
+
+# --- Disk I/O Latency ---
+
+DISKSTATS_SKIP_PREFIXES = ("loop", "ram", "sr", "fd")
+
+def read_diskstats():
+    """Snapshot /proc/diskstats as (monotonic time, {kernel name: counters})."""
+    import time
+    stats = {}
+    for line in read_proc("/proc/diskstats", 1 << 20).splitlines():
+        f = line.split()
+        if len(f) < 14 or f[2].startswith(DISKSTATS_SKIP_PREFIXES):
+            continue
+        stats[f[2]] = {
+            "reads": int(f[3]), "read_sectors": int(f[5]), "read_ms": int(f[6]),
+            "writes": int(f[7]), "write_sectors": int(f[9]), "write_ms": int(f[10]),
+            "io_ms": int(f[12]),
+        }
+    return time.monotonic(), stats
+
+def _kernel_to_lsblk_name(kname: str) -> str:
+    """Device-mapper nodes appear as dm-N in diskstats but by mapper name in lsblk."""
+    if kname.startswith("dm-"):
+        try:
+            return read_proc(f"/sys/block/{kname}/dm/name").strip()
+        except OSError:
+            pass
+    return kname
+
+def _lsblk_origins(devs, chain=None, out=None):
+    """Map every lsblk device name to its origin chain and mountpoints, as shown by check_disk()."""
+    chain = chain or []
+    out = {} if out is None else out
+    for dev in devs:
+        path = chain + [dev["name"]]
+        out[dev["name"]] = {"origin": '.'.join(path), "mountpoints": [mp for mp in dev.get("mountpoints", []) or [] if mp]}
+        if dev.get("children"):
+            _lsblk_origins(dev["children"], path, out)
+    return out
+
+def check_diskio(as_dict=False, interval=1.0, await_warn_ms=100.0, util_warn=90.0):
+    """Per-device utilisation, IOPS, throughput and average await from two /proc/diskstats samples.
+
+    The first sample comes from the "diskstats" provider, which is prefetched when the run
+    starts, so only the part of `interval` not already spent in other checks is waited for.
+    """
+    global issue_count
+    import time
+    try:
+        t0, before = DATA.get("diskstats")
+        remaining = interval - (time.monotonic() - t0)
+        if remaining > 0:
+            time.sleep(remaining)
+        t1, after = read_diskstats()
+    except Exception as e:
+        if not as_dict:
+            print(f"{RED}Disk I/O check failed: {e}{RESET}")
+        return {"devices": [], "status": "error", "issues": 0, "error": str(e)}
+    try:
+        origins = _lsblk_origins(DATA.get("lsblk"))
+    except Exception:
+        origins = {}
+
+    elapsed = max(t1 - t0, 1e-6)
+    devices = []
+    for kname, new in after.items():
+        old = before.get(kname)
+        if old is None:
+            continue
+        name = _kernel_to_lsblk_name(kname)
+        if origins and name not in origins:
+            continue
+        d = {k: new[k] - old[k] for k in new}
+        entry = {
+            # Same naming as the --disk table so entries can be joined on "device"
+            "device": f"/dev/{name}",
+            "mapper_path": f"/dev/mapper/{name}" if kname.startswith("dm-") else None,
+            "kernel_name": kname,
+            "origin": origins.get(name, {}).get("origin", name),
+            "mountpoints": origins.get(name, {}).get("mountpoints", []),
+            "util_pct": round(min(d["io_ms"] / (elapsed * 1000) * 100, 100.0), 1),
+            "read_iops": round(d["reads"] / elapsed, 1),
+            "write_iops": round(d["writes"] / elapsed, 1),
+            "read_mb_s": round(d["read_sectors"] * 512 / 1e6 / elapsed, 2),
+            "write_mb_s": round(d["write_sectors"] * 512 / 1e6 / elapsed, 2),
+            "read_await_ms": round(d["read_ms"] / d["reads"], 2) if d["reads"] else 0.0,
+            "write_await_ms": round(d["write_ms"] / d["writes"], 2) if d["writes"] else 0.0,
+        }
+        slow = []
+        if entry["util_pct"] >= util_warn:
+            slow.append(f"util {entry['util_pct']}%")
+        if max(entry["read_await_ms"], entry["write_await_ms"]) >= await_warn_ms:
+            slow.append(f"await {max(entry['read_await_ms'], entry['write_await_ms'])}ms")
+        entry["status"] = "slow" if slow else "ok"
+        entry["warnings"] = slow
+        devices.append(entry)
+
+    issues = sum(1 for e in devices if e["status"] != "ok")
+    result = {"devices": devices, "interval_s": round(elapsed, 2), "status": "slow" if issues else "ok", "issues": issues}
+    if as_dict:
+        return result
+    print_header("Disk I/O Latency & Utilisation")
+    print(f"{BOLD}{'Device':<24} : {'Util':>6} : {'r/s':>7} : {'w/s':>7} : {'rMB/s':>7} : {'wMB/s':>7} : {'r_await':>8} : {'w_await':>8} : {'Origin'}{RESET}")
+    print("─" * 130)
+    for e in devices:
+        color = RED if e["status"] != "ok" else GREEN
+        print(f"{color}{e['device']:<24} : {e['util_pct']:>5}% : {e['read_iops']:>7} : {e['write_iops']:>7} : {e['read_mb_s']:>7} : "
+              f"{e['write_mb_s']:>7} : {e['read_await_ms']:>6}ms : {e['write_await_ms']:>6}ms : {e['origin']}{RESET}")
+    print(f"(sampled over {result['interval_s']}s)")
+    issue_count += issues
+    return result
+
+# --- Journal Errors ---
+
+# First matching category wins; anything else is counted as "other"
+JOURNAL_CATEGORIES = (
+    ("oom", r"out of memory|oom-kill|oom_reaper|killed process \d+"),
+    ("storage", r"i/o error|blk_update_request|buffer i/o|csum failed|checksum error|nvme\d*.*(reset|timeout)|"
+                r"ata\d+.*(error|failed|exception)|ext4-fs error|xfs .*(error|corrupt)|medium error|remount.*read-only"),
+    ("thermal", r"thermal|temperature above threshold|critical temperature|throttl"),
+    ("coredump", r"dumped core|segfault|general protection fault"),
+)
+
+def iter_journal(extra_args=()):
+    """Stream journal entries as dicts from 'journalctl -o json', one line at a time.
+
+    Raises CalledProcessError (with journalctl's stderr) once the stream ends if journalctl
+    failed, so a failed query is never mistaken for an empty journal.
+    """
+    import json
+    import tempfile
+    # stderr goes to a file so a chatty journalctl cannot block on a full pipe
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(["journalctl", "-o", "json", "--no-pager", *extra_args],
+                                stdout=subprocess.PIPE, stderr=err)
+        try:
+            for line in proc.stdout:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+        if proc.returncode:
+            err.seek(0)
+            raise subprocess.CalledProcessError(proc.returncode, proc.args,
+                                                stderr=err.read().decode("utf-8", "replace").strip())
+
+def _journal_message(entry) -> str:
+    msg = entry.get("MESSAGE", "")
+    # Non-UTF-8 messages are exported as a list of byte values
+    if isinstance(msg, list):
+        msg = bytes(msg).decode("utf-8", "replace")
+    return str(msg)
+
+def check_journal(as_dict=False, cursor_file=None, samples=3):
+    """Classify error-priority journal messages since boot (storage, OOM, thermal, coredump).
+
+    Entries are streamed and only counts, first/last timestamps and the last few sample
+    lines per category are kept, so memory stays bounded. With cursor_file only entries
+    after the cursor saved by the previous run are read.
+    """
+    global issue_count
+    import re
+    from collections import deque
+    from datetime import datetime
+
+    patterns = [(name, re.compile(rx, re.IGNORECASE)) for name, rx in JOURNAL_CATEGORIES]
+    cursor = None
+    if cursor_file:
+        try:
+            with open(cursor_file, 'r') as f:
+                cursor = f.read().strip() or None
+        except OSError:
+            pass
+
+    def _scan(cursor):
+        args = ["-b", "-p", "err"]
+        if cursor:
+            args.append(f"--after-cursor={cursor}")
+        categories = {}
+        total = 0
+        for entry in iter_journal(args):
+            msg = _journal_message(entry)
+            if entry.get("SYSLOG_IDENTIFIER") == "systemd-coredump":
+                cat = "coredump"
+            else:
+                cat = next((name for name, rx in patterns if rx.search(msg)), "other")
+            try:
+                ts = datetime.fromtimestamp(int(entry["__REALTIME_TIMESTAMP"]) / 1e6).isoformat(timespec="seconds")
+            except (KeyError, ValueError):
+                ts = None
+            info = categories.get(cat)
+            if info is None:
+                info = categories[cat] = {"count": 0, "first_seen": ts, "last_seen": ts, "samples": deque(maxlen=samples)}
+            info["count"] += 1
+            info["last_seen"] = ts
+            ident = entry.get("SYSLOG_IDENTIFIER") or entry.get("_COMM") or "kernel"
+            info["samples"].append(f"{ident}: {msg}")
+            cursor = entry.get("__CURSOR", cursor)
+            total += 1
+        return categories, total, cursor
+
+    incremental = bool(cursor)
+    try:
+        try:
+            categories, total, cursor = _scan(cursor)
+        except subprocess.CalledProcessError as e:
+            if not cursor:
+                raise
+            # A corrupt or foreign cursor makes journalctl fail: drop it and rescan since boot
+            logging.warning(f"Ignoring unusable journal cursor in {cursor_file}: {e.stderr or e}")
+            try:
+                os.remove(cursor_file)
+            except OSError:
+                pass
+            incremental = False
+            categories, total, cursor = _scan(None)
+    except FileNotFoundError:
+        if not as_dict:
+            print_header("Journal Errors (since boot)")
+            print(f"{YELLOW}journalctl command not found.{RESET}")
+        return {"categories": {}, "total": 0, "status": "no_journalctl", "issues": 0, "error": "journalctl command not found"}
+    except Exception as e:
+        error = f"journalctl failed: {e.stderr or e}" if isinstance(e, subprocess.CalledProcessError) else str(e)
+        if not as_dict:
+            print_header("Journal Errors (since boot)")
+            print(f"{RED}Journal scan failed: {error}{RESET}")
+        return {"categories": {}, "total": 0, "status": "error", "issues": 0, "error": error}
+
+    if cursor_file and cursor:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cursor_file)), exist_ok=True)
+            with open(cursor_file, 'w') as f:
+                f.write(cursor + "\n")
+        except OSError as e:
+            logging.debug(f"Could not write journal cursor {cursor_file}: {e}")
+
+    for info in categories.values():
+        info["samples"] = list(info["samples"])
+    flagged = [name for name in categories if name != "other"]
+    result = {
+        "categories": categories,
+        "total": total,
+        "incremental": incremental,
+        "status": "attention" if flagged else "ok",
+        "issues": len(flagged),
+    }
+    if as_dict:
+        return result
+    print_header("Journal Errors (since boot)")
+    if not categories:
+        print(f"{GREEN}No error-priority messages.{RESET}")
+        return result
+    issue_count += len(flagged)
+    print(f"{BOLD}{'Category':<10} : {'Count':>6} : {'First seen':<19} : {'Last seen'}{RESET}")
+    print("─" * 62)
+    for name, info in sorted(categories.items(), key=lambda kv: -kv[1]["count"]):
+        color = YELLOW if name == "other" else RED
+        print(f"{color}{name:<10} : {info['count']:>6} : {info['first_seen'] or '?':<19} : {info['last_seen'] or '?'}{RESET}")
+        for sample in info["samples"]:
+            print(f"    {sample[:160]}")
+    return result
+
+# --- Package File Integrity ---
+
+PACMAN_LOCAL_DB = "/var/lib/pacman/local"
+
+def root_slug(root: str) -> str:
+    """File-name friendly name for a checked root ('host' for '/')."""
+    slug = os.path.abspath(root).strip('/').replace('/', '_')
+    return slug or "host"
+
+def default_integrity_cache(root="/"):
+    """Default location of the integrity verification cache (XDG cache dir), one file per root."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    name = "integrity.json" if root == "/" else f"integrity-{root_slug(root)}.json"
+    return os.path.join(base, "arch_check", name)
+
+def _mtree_unescape(value: bytes) -> str:
+    """Decode mtree octal escapes (e.g. '\\040' for a space) into a filesystem path."""
+    import re
+    return os.fsdecode(re.sub(rb'\\([0-7]{3})', lambda m: bytes([int(m.group(1), 8)]), value))
+
+def _parse_mtree(path: str):
+    """Yield (path, attrs) for every entry of a gzipped pacman mtree file, honouring /set and /unset."""
+    import gzip
+    defaults = {}
+    with gzip.open(path, 'rb') as f:
+        for raw in f:
+            fields = raw.split()
+            if not fields or fields[0].startswith(b'#'):
+                continue
+            if fields[0] == b'/set':
+                for kv in fields[1:]:
+                    k, _, v = kv.partition(b'=')
+                    defaults[k.decode()] = v.decode()
+                continue
+            if fields[0] == b'/unset':
+                for k in fields[1:]:
+                    if k == b'all':
+                        defaults.clear()
+                    else:
+                        defaults.pop(k.decode(), None)
+                continue
+            # Package metadata (.PKGINFO, .BUILDINFO, .INSTALL, .MTREE) is not installed on disk
+            if fields[0].startswith(b'./.'):
+                continue
+            attrs = dict(defaults)
+            for kv in fields[1:]:
+                k, _, v = kv.partition(b'=')
+                attrs[k.decode()] = _mtree_unescape(v) if k == b'link' else v.decode()
+            yield _mtree_unescape(fields[0])[1:], attrs
+
+def _read_backup_files(pkg_dir: str):
+    """Return the set of %BACKUP% paths (with leading '/') from a local DB desc file."""
+    backup = set()
+    try:
+        with open(os.path.join(pkg_dir, 'desc'), 'r', errors='surrogateescape') as f:
+            in_backup = False
+            for line in f:
+                line = line.rstrip('\n')
+                if line.startswith('%'):
+                    in_backup = line == '%BACKUP%'
+                elif in_backup and line:
+                    backup.add('/' + line.split('\t', 1)[0])
+    except OSError:
+        pass
+    return backup
+
+def _verify_package(pkg_dir: str, root: str = "/", cached=None):
+    """Verify the files of one installed package against its mtree.
+
+    Runs inside a worker process. Files whose (size, mtime_ns) match `cached` are
+    trusted without hashing. Returns a plain dict so it pickles cheaply.
+    """
+    import hashlib
+    import stat
+    cached = cached or {}
+    backup = _read_backup_files(pkg_dir)
+    result = {"package": os.path.basename(pkg_dir), "mismatches": [], "cache": {},
+              "files": 0, "hashed": 0, "cached": 0, "bytes": 0, "unreadable": 0, "errors": [], "error": None}
+
+    def mismatch(path, problem):
+        result["mismatches"].append({"path": path, "problem": problem, "backup": path in backup})
+
+    def verify(path, attrs):
+        full = os.path.join(root, path.lstrip('/'))
+        ftype = attrs.get('type', 'file')
+        try:
+            st = os.lstat(full)
+        except FileNotFoundError:
+            mismatch(path, "missing")
+            return
+        except OSError:
+            result["unreadable"] += 1
+            return
+        if ftype == 'dir':
+            if not stat.S_ISDIR(st.st_mode):
+                mismatch(path, "type mismatch (expected directory)")
+            return
+        if ftype == 'link':
+            if not stat.S_ISLNK(st.st_mode):
+                mismatch(path, "type mismatch (expected symlink)")
+            elif 'link' in attrs and os.readlink(full) != attrs['link']:
+                mismatch(path, "symlink target mismatch")
+            return
+        if not stat.S_ISREG(st.st_mode):
+            mismatch(path, "type mismatch (expected file)")
+            return
+        if 'mode' in attrs and stat.S_IMODE(st.st_mode) != int(attrs['mode'], 8):
+            mismatch(path, f"mode mismatch ({attrs['mode']} != {stat.S_IMODE(st.st_mode):o})")
+        if 'size' in attrs and st.st_size != int(attrs['size']):
+            mismatch(path, f"size mismatch ({attrs['size']} != {st.st_size})")
+            return
+        signature = [st.st_size, st.st_mtime_ns]
+        if cached.get(path) == signature:
+            result["cached"] += 1
+            result["cache"][path] = signature
+            return
+        digest = attrs.get('sha256digest')
+        if not digest:
+            return
+        h = hashlib.sha256()
+        try:
+            with open(full, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+        except OSError:
+            result["unreadable"] += 1
+            return
+        result["hashed"] += 1
+        result["bytes"] += st.st_size
+        if h.hexdigest() != digest:
+            mismatch(path, "sha256 mismatch")
+        else:
+            result["cache"][path] = signature
+
+    try:
+        for path, attrs in _parse_mtree(os.path.join(pkg_dir, 'mtree')):
+            result["files"] += 1
+            try:
+                verify(path, attrs)
+            except Exception as e:
+                # A bad entry (e.g. invalid mode=, unreadable symlink) must not hide the rest
+                result["errors"].append({"path": path, "error": f"{type(e).__name__}: {e}"})
+    except Exception as e:
+        # Corrupt or unreadable mtree: the package could not be (fully) verified
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def check_integrity(as_dict=False, jobs=None, cache_file=None, root=None):
+    """Verify package-owned files (size, mode, sha256) against the pacman mtree files in parallel.
+
+    Equivalent to 'pacman -Qkk' but spread over a process pool. Files whose size and mtime
+    are unchanged since the last successful verification (see cache_file) are not re-hashed.
+    Mismatches are printed as soon as each package finishes.
+    """
+    global issue_count
+    import json
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    root = root or DATA.root
+    db = os.path.join(root, PACMAN_LOCAL_DB.lstrip('/'))
+    cache_file = cache_file or default_integrity_cache(root)
+    summary = {"mismatches": [], "count": 0, "packages": 0, "files": 0, "hashed_files": 0,
+               "cached_files": 0, "unreadable": 0, "errors": [], "failed_packages": 0,
+               "elapsed_s": 0.0, "files_per_s": 0.0,
+               "mb_per_s": 0.0, "status": "ok", "issues": 0, "error": None}
+    try:
+        pkgs = sorted(p for p in os.listdir(db) if os.path.isfile(os.path.join(db, p, 'mtree')))
+    except OSError as e:
+        summary["status"] = "error"
+        summary["error"] = f"Cannot read pacman local database: {e}"
+        if not as_dict:
+            print_header("Package File Integrity")
+            print(f"{RED}{summary['error']}{RESET}")
+        return summary
+
+    cache = {}
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f).get("packages", {})
+    except (OSError, ValueError):
+        logging.debug(f"No usable integrity cache at {cache_file}")
+
+    if not as_dict:
+        print_header("Package File Integrity")
+    new_cache = {}
+    bytes_hashed = 0
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_verify_package, os.path.join(db, p), root, cache.get(p)) for p in pkgs]
+        for fut in as_completed(futures):
+            res = fut.result()
+            summary["packages"] += 1
+            summary["files"] += res["files"]
+            summary["hashed_files"] += res["hashed"]
+            summary["cached_files"] += res["cached"]
+            summary["unreadable"] += res["unreadable"]
+            bytes_hashed += res["bytes"]
+            new_cache[res["package"]] = res["cache"]
+            errors = res["errors"] + ([{"path": None, "error": res["error"]}] if res["error"] else [])
+            if errors:
+                summary["failed_packages"] += 1
+            for err in errors:
+                err["package"] = res["package"]
+                summary["errors"].append(err)
+                if not as_dict:
+                    where = f"{err['package']}: {err['path']}" if err["path"] else err["package"]
+                    print(f"{RED}  !! {where}: could not verify ({err['error']}){RESET}", flush=True)
+            for m in res["mismatches"]:
+                m["package"] = res["package"]
+                summary["mismatches"].append(m)
+                if not as_dict:
+                    color = YELLOW if m["backup"] else RED
+                    note = " [backup]" if m["backup"] else ""
+                    print(f"{color}  -> {m['package']}: {m['path']} ({m['problem']}){note}{RESET}", flush=True)
+    elapsed = time.monotonic() - start
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = cache_file + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"version": 1, "packages": new_cache}, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        logging.debug(f"Could not write integrity cache {cache_file}: {e}")
+
+    summary["count"] = len(summary["mismatches"])
+    # Packages that could not be fully verified count as issues so the run never looks clean
+    summary["issues"] = sum(1 for m in summary["mismatches"] if not m["backup"]) + summary["failed_packages"]
+    summary["status"] = ("modified" if any(not m["backup"] for m in summary["mismatches"])
+                         else "incomplete" if summary["errors"] else "ok")
+    summary["elapsed_s"] = round(elapsed, 2)
+    summary["files_per_s"] = round(summary["files"] / elapsed, 1) if elapsed > 0 else 0.0
+    summary["mb_per_s"] = round(bytes_hashed / 1e6 / elapsed, 1) if elapsed > 0 else 0.0
+    if as_dict:
+        return summary
+    issue_count += summary["issues"]
+    if summary["errors"]:
+        print(f"{RED}{summary['failed_packages']} package(s) could not be fully verified ({len(summary['errors'])} error(s)).{RESET}")
+    elif not summary["mismatches"]:
+        print(f"{GREEN}All package files intact.{RESET}")
+    if summary["unreadable"]:
+        print(f"{YELLOW}{summary['unreadable']} file(s) could not be read (run with sudo for a complete check).{RESET}")
+    print(f"{summary['packages']} packages, {summary['files']} files "
+          f"({summary['hashed_files']} hashed, {summary['cached_files']} cached) in {summary['elapsed_s']}s: "
+          f"{summary['files_per_s']} files/s, {summary['mb_per_s']} MB/s")
+    return summary
+
+# --- Pacman Log ---
+
+PACMAN_LOG = "/var/log/pacman.log"
+# Warning/error lines that other checks already cover (pacnew/pacsave -> --pacnew)
+PACMAN_LOG_IGNORE = (b"installed as", b"saved as")
+
+def boot_time() -> float:
+    """System boot time (epoch seconds) from the btime field of /proc/stat."""
+    for line in read_proc("/proc/stat", 1 << 20).splitlines():
+        if line.startswith("btime "):
+            return float(line.split()[1])
+    raise ValueError("no btime in /proc/stat")
+
+@functools.lru_cache(maxsize=1024)
+def _parse_log_stamp(stamp: bytes) -> float:
+    from datetime import datetime
+    text = stamp.decode("ascii", "replace")
+    try:
+        return datetime.strptime(text, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    except ValueError:
+        try:
+            return datetime.strptime(text, "%Y-%m-%d %H:%M").timestamp()
+        except ValueError:
+            return 0.0
+
+def _pacman_log_time(line: bytes):
+    """Epoch seconds of a pacman.log line ('[2024-01-10T12:35:01+0100]' or the old '[2019-01-01 12:34]').
+
+    Lines of one transaction share a timestamp, so a small LRU cache avoids most strptime calls.
+    """
+    return _parse_log_stamp(line[1:line.find(b"]")])
+
+def _pacman_command_flags(command: str):
+    """Return (sync, refresh, sysupgrade) for a logged pacman command line."""
+    import shlex
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        args = command.split()
+    flags = set()
+    for arg in args[1:]:
+        if arg == "--":
+            break
+        if arg.startswith("--"):
+            flags.add({"--sync": "S", "--refresh": "y", "--sysupgrade": "u"}.get(arg, ""))
+        elif arg.startswith("-"):
+            flags.update(arg[1:])
+    return "S" in flags, "y" in flags, "u" in flags
+
+def scan_pacman_log(mm, start=0, end=None, boot=None, max_warnings=20):
+    """Scan pacman.log bytes backwards from end, stopping once all questions are answered.
+
+    Collects the last full system upgrade, 'pacman -Sy' runs without -u after it (partial
+    upgrades), packages upgraded since boot and scriptlet/ALPM warnings since the last full
+    upgrade. The scan stops at the first line that is both before the last full upgrade and
+    before boot, so only the tail of a large log is ever touched.
+    """
+    end = len(mm) if end is None else end
+    state = {"last_full_upgrade": None, "full_upgrade_command": None, "partial_upgrades": [],
+             "upgraded": {}, "warnings": [], "warning_count": 0, "bytes_scanned": 0}
+    full = None
+    lines_after_full = 0
+    pos = end
+    while pos > start:
+        nl = mm.rfind(b"\n", start, pos - 1)
+        begin = nl + 1 if nl >= 0 else start
+        line = mm[begin:pos].rstrip(b"\r\n")
+        pos = begin
+        if not line.startswith(b"["):
+            continue
+        if full is not None:
+            lines_after_full += 1
+            if b"[PACMAN] Running '" in line and state["full_upgrade_command"] is None:
+                state["full_upgrade_command"] = line.split(b"Running '", 1)[1].rstrip(b"'").decode("utf-8", "replace")
+            # The command is logged a line or two above the upgrade marker
+            found_command = state["full_upgrade_command"] is not None or lines_after_full > 10
+            if found_command and (boot is None or _pacman_log_time(line) < boot):
+                # Past the last full upgrade and before boot: nothing left to learn
+                break
+        if b"[PACMAN] starting full system upgrade" in line:
+            # Only the newest one counts; older upgrades since boot are passed on the way back
+            if full is None:
+                full = _pacman_log_time(line)
+                state["last_full_upgrade"] = full
+        elif b"[PACMAN] Running '" in line:
+            command = line.split(b"Running '", 1)[1].rstrip(b"'").decode("utf-8", "replace")
+            if full is not None:
+                continue
+            sync, refresh, sysupgrade = _pacman_command_flags(command)
+            if sync and refresh and not sysupgrade:
+                state["partial_upgrades"].insert(0, {"time": _pacman_log_time(line), "command": command})
+        elif b"] upgraded " in line and b"[ALPM]" in line:
+            if boot is None:
+                continue
+            ts = _pacman_log_time(line)
+            if ts < boot:
+                continue
+            rest = line.split(b"] upgraded ", 1)[1].decode("utf-8", "replace")
+            name, _, versions = rest.partition(" (")
+            old, _, new = versions.rstrip(")").partition(" -> ")
+            entry = state["upgraded"].get(name)
+            if entry is None:
+                state["upgraded"][name] = {"package": name, "old": old, "new": new, "time": ts}
+            else:
+                # Scanning backwards: keep the newest version, widen to the oldest one
+                entry["old"] = old
+        elif full is None and (b"[ALPM-SCRIPTLET]" in line or b"[ALPM] warning:" in line or b"[ALPM] error:" in line):
+            lower = line.lower()
+            if (b"warning" in lower or b"error" in lower) and not any(s in line for s in PACMAN_LOG_IGNORE):
+                state["warning_count"] += 1
+                if len(state["warnings"]) < max_warnings:
+                    state["warnings"].insert(0, line.decode("utf-8", "replace"))
+    state["bytes_scanned"] = end - pos
+    state["complete"] = full is not None
+    return state
+
+def _merge_pacman_state(old, new, boot, max_warnings=20):
+    """Combine the state saved for the log up to the checkpoint with a scan of the appended bytes."""
+    merged = dict(new)
+    if not new["complete"]:
+        merged["last_full_upgrade"] = old.get("last_full_upgrade")
+        merged["full_upgrade_command"] = old.get("full_upgrade_command")
+        merged["partial_upgrades"] = old.get("partial_upgrades", []) + new["partial_upgrades"]
+        merged["warnings"] = (old.get("warnings", []) + new["warnings"])[-max_warnings:]
+        merged["warning_count"] = old.get("warning_count", 0) + new["warning_count"]
+        merged["complete"] = old.get("complete", False)
+    upgraded = {}
+    if boot is not None:
+        for name, entry in old.get("upgraded", {}).items():
+            if entry["time"] >= boot:
+                upgraded[name] = dict(entry)
+        for name, entry in new["upgraded"].items():
+            if name in upgraded:
+                entry = dict(entry, old=upgraded[name]["old"])
+            upgraded[name] = entry
+    merged["upgraded"] = upgraded
+    return merged
+
+def check_upgrades(as_dict=False, checkpoint=None, stale_days=30):
+    """Report the last full upgrade, partial upgrades, upgrades since boot and scriptlet warnings.
+
+    pacman.log is mmap'ed and read backwards from the end (see scan_pacman_log()). With a
+    checkpoint file only the bytes appended since the previous run are scanned; a truncated
+    or rotated log (different inode or smaller size) triggers a full rescan.
+    """
+    global issue_count
+    import json
+    import mmap
+    import time
+
+    path = root_path(PACMAN_LOG)
+    boot = None
+    if DATA.root == "/":
+        try:
+            boot = DATA.get("boot_time")
+        except Exception as e:
+            logging.debug(f"Could not read boot time: {e}")
+
+    saved = None
+    if checkpoint:
+        try:
+            with open(checkpoint, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            logging.debug(f"No usable pacman.log checkpoint at {checkpoint}")
+
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            offset = 0
+            if saved and saved.get("path") == path and saved.get("inode") == st.st_ino and saved.get("offset", 0) <= st.st_size:
+                offset = saved["offset"]
+            else:
+                saved = None
+            if st.st_size > offset:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Ignore a trailing partial line still being written; it is picked up next run
+                    end = mm.rfind(b"\n", offset) + 1 or offset
+                    state = scan_pacman_log(mm, offset, end, boot)
+            else:
+                end = offset
+                state = scan_pacman_log(b"", boot=boot)
+    except OSError as e:
+        if not as_dict:
+            print_header("Pacman Upgrade History")
+            print(f"{RED}Cannot read {path}: {e}{RESET}")
+        return {"status": "error", "issues": 0, "error": f"Cannot read {path}: {e}"}
+
+    if saved:
+        state = _merge_pacman_state(saved.get("state", {}), state, boot)
+    if checkpoint:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(checkpoint)), exist_ok=True)
+            tmp = checkpoint + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump({"version": 1, "path": path, "inode": st.st_ino, "offset": end, "state": state}, f)
+            os.replace(tmp, checkpoint)
+        except OSError as e:
+            logging.debug(f"Could not write pacman.log checkpoint {checkpoint}: {e}")
+
+    now = time.time()
+    last = state["last_full_upgrade"]
+    age_days = round((now - last) / 86400, 1) if last else None
+    stale = age_days is None or age_days > stale_days
+    partial = state["partial_upgrades"]
+    upgraded = sorted(state["upgraded"].values(), key=lambda e: e["time"])
+    result = {
+        "log": path,
+        "last_full_upgrade": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(last)) if last else None,
+        "days_since_full_upgrade": age_days,
+        "full_upgrade_command": state["full_upgrade_command"],
+        "stale": stale,
+        "partial_upgrades": [{"time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(p["time"])), "command": p["command"]} for p in partial],
+        "upgraded_since_boot": [{"package": e["package"], "old": e["old"], "new": e["new"]} for e in upgraded] if boot is not None else None,
+        "warnings": state["warnings"],
+        "warning_count": state["warning_count"],
+        "bytes_scanned": state["bytes_scanned"],
+        "incremental": offset > 0,
+        "status": "stale" if stale else "partial" if partial else "ok",
+        "issues": int(stale) + int(bool(partial)),
+    }
+    if as_dict:
+        return result
+
+    print_header("Pacman Upgrade History")
+    issue_count += result["issues"]
+    if last:
+        color = RED if stale else GREEN
+        print(f"{'Last full upgrade':<20} : {color}{result['last_full_upgrade']} ({age_days} days ago){RESET}")
+    else:
+        print(f"{'Last full upgrade':<20} : {RED}none found in {path}{RESET}")
+    if stale:
+        print(f"{RED}{BOLD}![STALE]: No full system upgrade (pacman -Syu) in the last {stale_days} days.{RESET}")
+    if partial:
+        print(f"{RED}{'Partial upgrades':<20} : {len(partial)} since the last full upgrade{RESET}")
+        for p in result["partial_upgrades"]:
+            print(f"    {p['time']}  {p['command']}")
+    else:
+        print(f"{'Partial upgrades':<20} : {GREEN}none{RESET}")
+    if boot is not None:
+        print(f"{'Upgraded since boot':<20} : {len(upgraded)}")
+        for e in upgraded:
+            color = YELLOW if e["package"].startswith(("linux", "systemd", "glibc")) else ""
+            print(f"    {color}{e['package']:<24} {e['old']} -> {e['new']}{RESET if color else ''}")
+    if state["warning_count"]:
+        print(f"{YELLOW}{'Scriptlet warnings':<20} : {state['warning_count']} since the last full upgrade{RESET}")
+        for w in state["warnings"]:
+            print(f"    {w[:160]}")
+    return result
+
+# --- Check Registry ---
+# Each check declares its CLI flag, the providers it reads and optional extra arguments.
+# main() builds the parser, the run order and both output modes from this table.
+
+CHECKS = {}
+
+PLUGIN_ENTRY_POINT_GROUP = "arch_check.checks"
+PLUGIN_DIRS = ("/etc/arch_check/checks.d", "~/.config/arch_check/checks.d")
+
+def register_check(name: str, func, *flags, help="", description=None, providers=(), in_all=True,
+                   structured=True, host_only=False, arguments=None, options=None):
+    """Register a check.
+
+    func(as_dict=False, **options(args)) prints its section, or returns a dict with
+    "status" and "issues" when as_dict is True. flags default to --<name>; a --no-<name>
+    switch is always added. providers are prefetched concurrently before checks run.
+    arguments(parser) may add extra CLI options, options(args) maps them to keyword arguments.
+    Checks with in_all=False only run when requested explicitly, not with --all.
+    host_only checks inspect the running system and are skipped with --root.
+    """
+    CHECKS[name] = {
+        "func": func,
+        "flags": flags or (f"--{name}",),
+        "help": help,
+        "description": description,
+        "providers": tuple(providers),
+        "in_all": in_all,
+        "structured": structured,
+        "host_only": host_only,
+        "arguments": arguments,
+        "options": options,
+    }
+    return func
+
+def load_plugins(dirs=PLUGIN_DIRS):
+    """Load third-party checks from the entry-point group and from drop-in *.py directories.
+
+    Entry points may name a module (which registers on import) or a callable that is
+    called without arguments. ARCH_CHECK_PLUGIN_PATH adds colon-separated directories.
+    """
+    import glob
+    import importlib.util
+    # Plugins do 'import arch_check'; make that resolve to this module even when run as a script
+    sys.modules.setdefault("arch_check", sys.modules[__name__])
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points()
+        group = eps.select(group=PLUGIN_ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(PLUGIN_ENTRY_POINT_GROUP, [])
+        for ep in group:
+            try:
+                obj = ep.load()
+                if callable(obj):
+                    obj()
+            except Exception as e:
+                logging.warning(f"Failed to load plugin entry point {ep.name}: {e}")
+    except Exception as e:
+        logging.debug(f"Entry point discovery failed: {e}")
+    extra = [d for d in os.environ.get("ARCH_CHECK_PLUGIN_PATH", "").split(":") if d]
+    for directory in list(dirs) + extra:
+        for path in sorted(glob.glob(os.path.join(os.path.expanduser(directory), "*.py"))):
+            mod_name = "arch_check_plugin_" + os.path.splitext(os.path.basename(path))[0]
+            try:
+                spec = importlib.util.spec_from_file_location(mod_name, path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[mod_name] = module
+                spec.loader.exec_module(module)
+            except Exception as e:
+                logging.warning(f"Failed to load plugin {path}: {e}")
+
+def _disk_arguments(parser):
+    _ = parser.add_argument("--drill-down", action="store_true", help="With --disk, scan critical (>90%%) mounts for the largest subtrees, dirs and files")
+    _ = parser.add_argument("--drill-top", type=int, default=10, metavar="N", help="Number of entries kept per space-hog list (default: 10)")
+    _ = parser.add_argument("--drill-budget", type=float, default=30.0, metavar="SECONDS", help="Time budget per drill-down scan (default: 30)")
+    _ = parser.add_argument("--watch-disk", action="store_true", help="With --disk, keep running and refresh mounts on mount/hotplug events")
+
+def _diskio_arguments(parser):
+    _ = parser.add_argument("--io-interval", type=float, default=1.0, metavar="SECONDS", help="Sampling interval for --diskio (default: 1)")
+    _ = parser.add_argument("--io-await-warn", type=float, default=100.0, metavar="MS", help="Flag devices whose average await exceeds MS (default: 100)")
+    _ = parser.add_argument("--io-util-warn", type=float, default=90.0, metavar="PCT", help="Flag devices busier than PCT percent (default: 90)")
+
+def _upgrades_arguments(parser):
+    _ = parser.add_argument("--pacman-log-checkpoint", default=None, metavar="PATH", help="Checkpoint file so repeated --upgrades runs only parse appended pacman.log lines")
+    _ = parser.add_argument("--stale-days", type=float, default=30, metavar="DAYS", help="Flag the system as stale after DAYS without a full upgrade (default: 30)")
+
+def _resources_arguments(parser):
+    _ = parser.add_argument("--watch", type=float, default=None, metavar="SECONDS", help="With --resources, keep sampling every SECONDS until Ctrl-C")
+    _ = parser.add_argument("--watch-samples", type=int, default=60, metavar="N", help="Samples kept in the --watch ring buffer (default: 60)")
+    _ = parser.add_argument("--watch-count", type=int, default=None, metavar="N", help="Stop --watch after N samples")
+
+def _journal_arguments(parser):
+    _ = parser.add_argument("--journal-cursor", default=None, metavar="PATH", help="Cursor file so repeated --journal runs only read new entries")
+
+def _integrity_arguments(parser):
+    _ = parser.add_argument("--integrity-cache", default=None, metavar="PATH", help="Integrity verification cache file (default: ~/.cache/arch_check/integrity.json)")
+
+register_check("logo", print_logo_info, "-l", "--logo", structured=False, host_only=True, providers=("meminfo",),
+               help="Print the Arch logo and hardware summary")
+register_check("sensors", check_sensors, "--sensors", host_only=True, providers=("sensors",),
+               help="Show all available temperature sensors and warn if high")
+register_check("smart", check_smart, "--smart", host_only=True,
+               help="Show SMART disk health summary (if supported)")
+register_check("kernel", check_kernel(), "-k", "--kernel", providers=("pacman_packages", "running_kernel", "installed_kernels"),
+               help="Check for kernel/running version mismatch",
+               description="Compares 'uname -r' with the version in the pacman DB.\n"
+                           "If they differ, your system cannot load new modules until reboot.")
+register_check("pacnew", check_pacnew, "-p", "--pacnew",
+               help="Scan for unmerged .pacnew config files",
+               description="Scans /etc for .pacnew and .pacsave files. These are created\n"
+                           "when an update has a new default config but you've modified yours.")
+register_check("services", check_failed_services, "-s", "--services", host_only=True, providers=("failed_units",),
+               help="List failed systemd services",
+               description="Queries systemd for any units in a 'failed' state. Useful for\n"
+                           "catching silent background daemon crashes.")
+register_check("orphans", check_orphans, "-o", "--orphans", providers=("pacman_orphans",),
+               help="List orphaned packages (unused dependencies)",
+               description="Lists packages installed as dependencies but no longer required\n"
+                           "by any other package. Helps keep the system lean.")
+register_check("disk", check_disk, "-d", "--disk", host_only=True, providers=("lsblk", "fstab", "df"),
+               help="Show usage, filesystem type, and LVM/LUKS origin",
+               description="Analyzes usage for /, /boot, and /home. Specifically tracks\n"
+                           "LVM/LUKS lineage to show you the physical origin of each mount.",
+               arguments=_disk_arguments,
+               options=lambda args: {"drill_down": args.drill_down, "top_n": args.drill_top, "time_budget": args.drill_budget, "watch": args.watch_disk})
+register_check("diskio", check_diskio, "--diskio", host_only=True, providers=("diskstats", "lsblk"),
+               help="Show disk utilisation, IOPS, throughput and await from /proc/diskstats",
+               description="Samples /proc/diskstats twice (--io-interval) and flags saturated\n"
+                           "or slow devices. The first sample is taken when the run starts,\n"
+                           "so the wait overlaps with the other checks.",
+               arguments=_diskio_arguments,
+               options=lambda args: {"interval": args.io_interval, "await_warn_ms": args.io_await_warn, "util_warn": args.io_util_warn})
+register_check("stats", check_stats, "-t", "--stats",
+               providers=("pacman_packages", "pacman_explicit", "pacman_deps", "pacman_foreign"),
+               help="Show pacman package statistics (Native vs AUR)",
+               description="Show pacman package statistics (Native vs AUR)")
+register_check("upgrades", check_upgrades, "-u", "--upgrades", providers=("boot_time",),
+               help="Check pacman.log for the last full upgrade, partial upgrades and scriptlet warnings",
+               description="Reads /var/log/pacman.log backwards from the end and reports the\n"
+                           "last 'pacman -Syu', partial upgrades (-Sy without -u) since then,\n"
+                           "packages upgraded since boot and scriptlet warnings.",
+               arguments=_upgrades_arguments,
+               options=lambda args: {"checkpoint": args.pacman_log_checkpoint, "stale_days": args.stale_days})
+register_check("resources", check_resources, "-r", "--resources", host_only=True,
+               help="Check memory, swap, zram, load and pressure stall (PSI)",
+               description="Parses /proc/meminfo, /proc/loadavg, /proc/pressure/* and zram\n"
+                           "stats and warns on low memory, heavy swap, high load or pressure.\n"
+                           "With --watch the files are re-read every SECONDS into a ring buffer.",
+               arguments=_resources_arguments,
+               options=lambda args: {"watch": args.watch, "samples": args.watch_samples, "count": args.watch_count})
+register_check("journal", check_journal, "--journal", host_only=True,
+               help="Classify journal errors since boot (storage, OOM, thermal, coredump)",
+               description="Streams error-priority journal messages since boot and groups\n"
+                           "them into storage, OOM, thermal and coredump categories.",
+               arguments=_journal_arguments,
+               options=lambda args: {"cursor_file": args.journal_cursor})
+register_check("integrity", check_integrity, "--integrity", in_all=False,
+               help="Verify package files against pacman mtree (size, mode, sha256), not part of --all",
+               description="Verifies size, mode and sha256 of every package-owned file\n"
+                           "against the pacman mtree files (like 'pacman -Qkk') using a\n"
+                           "process pool. Unchanged files are skipped via a persisted cache.\n"
+                           "Not included in --all.",
+               arguments=_integrity_arguments,
+               options=lambda args: {"jobs": args.jobs, "cache_file": args.integrity_cache})
+
+# --- Reports & Batch Mode ---
+
+def build_report(checks):
+    """Run (spec, func, name) checks as dicts and add the summary section."""
+    results = {}
+    for spec, func, name in checks:
+        # All checks that support as_dict should use it
+        results[name] = func(as_dict=True) if spec["structured"] else None
+    # Add summary with per-section issues
+    issues_by_section = {k: (v.get('issues', 0) if isinstance(v, dict) else 0) for k, v in results.items() if k != 'summary'}
+    results['summary'] = {
+        'issues': sum(issues_by_section.values()),
+        'issues_by_section': issues_by_section,
+        'status': 'ok' if all((v.get('status', 'ok') == 'ok' if isinstance(v, dict) else True) for v in results.values() if v) else 'attention',
+    }
+    return results
+
+def root_report(root: str, plan):
+    """Build the JSON report for one root. plan is a list of (check name, kwargs).
+
+    Runs in a batch worker process, so everything it needs is passed as plain data.
+    """
+    import functools
+    global DATA
+    if any(name not in CHECKS for name, _ in plan):
+        load_plugins()
+    if not os.path.exists(os.path.join(root, "etc/arch-release")):
+        return {"summary": {"root": root, "issues": 0, "issues_by_section": {}, "status": "error",
+                            "error": "Not an Arch Linux root: etc/arch-release not found"}}
+    DATA = DataContext(root=root)
+    checks = [(CHECKS[name], functools.partial(CHECKS[name]["func"], **kwargs), name) for name, kwargs in plan]
+    DATA.prefetch(p for spec, _, _ in checks for p in spec["providers"])
+    try:
+        report = build_report(checks)
+    finally:
+        DATA.close()
+    report["summary"]["root"] = root
+    return report
+
+def run_batch(roots, plan, jobs=None, output_dir=None):
+    """Check many roots in parallel across a process pool; one JSON report per root.
+
+    Reports are written to output_dir/<root>.json, or printed as one JSON line per root.
+    Returns the number of roots that need attention.
+    """
+    import json
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    attention = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(root_report, root, plan): root for root in roots}
+        for fut in as_completed(futures):
+            root = futures[fut]
+            try:
+                report = fut.result()
+            except Exception as e:
+                report = {"summary": {"root": root, "issues": 0, "issues_by_section": {}, "status": "error", "error": str(e)}}
+            if report["summary"]["status"] != "ok":
+                attention += 1
+            if output_dir:
+                path = os.path.join(output_dir, f"{root_slug(root)}.json")
+                with open(path, 'w') as f:
+                    json.dump(report, f, indent=2)
+                print(f"{root}: {report['summary']['status']} ({report['summary']['issues']} issues) -> {path}", flush=True)
+            else:
+                print(json.dumps(report), flush=True)
+    return attention
+
+# --- Report Diff ---
+
+# Fields used to match list entries between two reports. The first one that is present and
+# unique in both lists wins, then all of them combined; lists named in DIFF_LIST_KEYS use
+# their own (composite) key instead.
+DIFF_KEYS = ("mount", "device", "unit", "package", "path", "component", "label", "name")
+DIFF_LIST_KEYS = {
+    "mismatches": ("package", "path"),
+    "sensors": ("name",),
+}
+# Volatile fields that change on every run and are not worth reporting
+DIFF_IGNORE = {"elapsed_s", "files_per_s", "mb_per_s", "interval_s", "samples", "history", "first_seen", "last_seen", "color", "line", "bytes_scanned", "incremental"}
+# Minimum absolute change for numeric fields (by field name); --threshold overrides
+DIFF_THRESHOLDS = {"usage_percent": 1.0, "temp": 5.0, "util_pct": 10.0, "used_pct": 5.0, "days_since_full_upgrade": 7.0}
+
+def _diff_index(items, keys):
+    """Index a list of dicts by the given key fields; None if they do not identify every entry."""
+    index = {}
+    for item in items:
+        if not all(k in item for k in keys):
+            return None
+        label = ",".join(f"{k}={item[k]}" for k in keys)
+        if label in index:
+            return None
+        index[label] = item
+    return index
+
+def _diff_indexes(old, new, field):
+    """Index both lists by the same key: DIFF_LIST_KEYS[field], else the first usable DIFF_KEYS
+    field, else all DIFF_KEYS fields present. Entries are never paired by position."""
+    if field in DIFF_LIST_KEYS:
+        candidates = [DIFF_LIST_KEYS[field]]
+    else:
+        candidates = [(k,) for k in DIFF_KEYS]
+        candidates.append(tuple(k for k in DIFF_KEYS if all(k in i for i in old + new)))
+    for keys in candidates:
+        if not keys:
+            continue
+        old_idx, new_idx = _diff_index(old, keys), _diff_index(new, keys)
+        if old_idx is not None and new_idx is not None:
+            return old_idx, new_idx
+    return None, None
+
+def _diff_hashable(value):
+    import json
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, sort_keys=True, default=str)
+
+def _diff_value(old, new, path, changes, thresholds, min_delta):
+    field = path.rsplit('.', 1)[-1]
+    if field in DIFF_IGNORE:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in list(old) + [k for k in new if k not in old]:
+            sub = f"{path}.{key}" if path else str(key)
+            if key not in new:
+                changes.append({"path": sub, "change": "removed", "old": old[key]})
+            elif key not in old:
+                changes.append({"path": sub, "change": "added", "new": new[key]})
+            else:
+                _diff_value(old[key], new[key], sub, changes, thresholds, min_delta)
+        return
+    if isinstance(old, list) and isinstance(new, list):
+        if all(isinstance(i, dict) for i in old + new) and (old or new):
+            old_idx, new_idx = _diff_indexes(old, new, field)
+            if old_idx is not None:
+                for label, item in old_idx.items():
+                    if label not in new_idx:
+                        changes.append({"path": f"{path}[{label}]", "change": "removed", "old": item})
+                    else:
+                        _diff_value(item, new_idx[label], f"{path}[{label}]", changes, thresholds, min_delta)
+                for label, item in new_idx.items():
+                    if label not in old_idx:
+                        changes.append({"path": f"{path}[{label}]", "change": "added", "new": item})
+                return
+        # Unkeyed lists are compared as sets of whole entries
+        old_set, new_set = {_diff_hashable(v) for v in old}, {_diff_hashable(v) for v in new}
+        changes.extend({"path": path, "change": "removed", "old": v} for v in old if _diff_hashable(v) not in new_set)
+        changes.extend({"path": path, "change": "added", "new": v} for v in new if _diff_hashable(v) not in old_set)
+        return
+    numeric = (int, float)
+    if isinstance(old, numeric) and isinstance(new, numeric) and not isinstance(old, bool) and not isinstance(new, bool):
+        delta = new - old
+        if delta and abs(delta) >= thresholds.get(field, min_delta):
+            changes.append({"path": path, "change": "changed", "old": old, "new": new, "delta": round(delta, 4)})
+        return
+    if old != new:
+        changes.append({"path": path, "change": "changed", "old": old, "new": new})
+
+def diff_reports(old, new, thresholds=None, min_delta=0.0):
+    """Structured diff of two arch_check JSON reports.
+
+    List entries are matched by key (mount, device, unit, package, path, ...) through a
+    dict index, so the diff is linear in the report size. Returns a list of
+    {"path", "change": added|removed|changed, "old", "new", "delta"} dicts.
+    """
+    changes = []
+    _diff_value(old, new, "", changes, dict(DIFF_THRESHOLDS, **(thresholds or {})), min_delta)
+    return changes
+
+def diff_files(old_path, new_path, thresholds=None, min_delta=0.0):
+    """Load two report files and diff them (top-level so it can run in a worker process)."""
+    import json
+    with open(old_path, 'r') as f:
+        old = json.load(f)
+    with open(new_path, 'r') as f:
+        new = json.load(f)
+    changes = diff_reports(old, new, thresholds, min_delta)
+    return {"old": old_path, "new": new_path, "changes": changes, "count": len(changes)}
+
+def _short(value, width=80):
+    import json
+    text = value if isinstance(value, str) else json.dumps(value)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+def print_diff(result):
+    print_header(f"Diff: {result['old']} -> {result['new']}")
+    if result.get("error"):
+        print(f"{RED}{result['error']}{RESET}")
+        return
+    if not result["changes"]:
+        print(f"{GREEN}No changes.{RESET}")
+        return
+    for c in result["changes"]:
+        if c["change"] == "added":
+            print(f"{GREEN}+ {c['path']}: {_short(c['new'])}{RESET}")
+        elif c["change"] == "removed":
+            print(f"{RED}- {c['path']}: {_short(c['old'])}{RESET}")
+        else:
+            delta = f" ({c['delta']:+})" if "delta" in c else ""
+            print(f"{YELLOW}~ {c['path']}: {_short(c['old'], 40)} -> {_short(c['new'], 40)}{delta}{RESET}")
+
+def diff_main(argv):
+    """Entry point of 'arch_check diff OLD NEW'."""
+    import json
+    from concurrent.futures import ProcessPoolExecutor
+    parser = argparse.ArgumentParser(prog="arch_check diff", description="Compare two arch_check --json reports, or two directories of reports paired by file name.")
+    parser.add_argument("old", help="Old report (or directory of reports)")
+    parser.add_argument("new", help="New report (or directory of reports)")
+    parser.add_argument("--threshold", action="append", default=[], metavar="FIELD=VALUE", help="Minimum numeric change reported for FIELD, e.g. usage_percent=2")
+    parser.add_argument("--min-delta", type=float, default=0.0, help="Minimum change for numeric fields without a threshold (default: 0)")
+    parser.add_argument("-j", "--json", action="store_true", help="Output the diff as JSON")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N", help="Worker processes when diffing directories")
+    parser.add_argument("--exit-code", action="store_true", help="Exit with 1 when there are changes")
+    parser.add_argument("--color", dest="color", action="store_true", default=None, help="Enable colored output")
+    parser.add_argument("--no-color", dest="color", action="store_false", default=None, help="Disable colored output")
+    args = parser.parse_args(argv)
+    set_colors(sys.stdout.isatty() if args.color is None else args.color)
+
+    thresholds = {}
+    for item in args.threshold:
+        field, _, value = item.partition('=')
+        try:
+            thresholds[field] = float(value)
+        except ValueError:
+            parser.error(f"invalid --threshold '{item}', expected FIELD=VALUE")
+
+    if os.path.isdir(args.old) and os.path.isdir(args.new):
+        old_files = {f for f in os.listdir(args.old) if f.endswith(".json")}
+        new_files = {f for f in os.listdir(args.new) if f.endswith(".json")}
+        pairs = sorted(old_files & new_files)
+        results = []
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(diff_files, os.path.join(args.old, f), os.path.join(args.new, f), thresholds, args.min_delta) for f in pairs]
+            for f, fut in zip(pairs, futures):
+                try:
+                    results.append(fut.result())
+                except Exception as e:
+                    results.append({"old": os.path.join(args.old, f), "new": os.path.join(args.new, f), "changes": [], "count": 0, "error": str(e)})
+        unpaired = {"only_old": sorted(old_files - new_files), "only_new": sorted(new_files - old_files)}
+        if args.json:
+            print(json.dumps({"pairs": results, **unpaired}, indent=2))
+        else:
+            for result in results:
+                print_diff(result)
+            for name in unpaired["only_old"]:
+                print(f"{RED}- only in {args.old}: {name}{RESET}")
+            for name in unpaired["only_new"]:
+                print(f"{GREEN}+ only in {args.new}: {name}{RESET}")
+        changed = any(r["count"] for r in results) or unpaired["only_old"] or unpaired["only_new"]
+    else:
+        try:
+            result = diff_files(args.old, args.new, thresholds, args.min_delta)
+        except (OSError, ValueError) as e:
+            print(f"{RED}diff failed: {e}{RESET}", file=sys.stderr)
+            return 2
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_diff(result)
+        changed = bool(result["count"])
+    return 1 if args.exit_code and changed else 0
 
 # --- Main ---
 
+def set_colors(enable: bool):
+    """Switch the module-level color codes on or off."""
+    colors = get_colors(enable)
+    for name, code in colors.items():
+        globals()[name] = code
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "diff":
+        sys.exit(diff_main(sys.argv[2:]))
+    # Logging is configured before plugins load so their messages honour --log-level
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument("--log-level", default="WARNING")
+    pre_args, _ = pre_parser.parse_known_args()
+    log_level = getattr(logging, str(pre_args.log_level).upper(), logging.WARNING)
+    logging.basicConfig(level=log_level, format='[%(levelname)s] %(message)s')
+    logger = logging.getLogger(__name__)
+    load_plugins()
     # 1. Setup Parser
     # Use RawDescriptionHelpFormatter to preserve newlines in descriptions
+    descriptions = []
+    for name, spec in CHECKS.items():
+        if spec["description"]:
+            lines = spec["description"].splitlines()
+            descriptions.append(f"  {BOLD}{'--' + name:<10}{RESET} " + f"\n{' ' * 13}".join(lines))
+    extended = "\n\n".join(descriptions)
     parser = argparse.ArgumentParser(
         description=f"{CYAN}{BOLD}Arch Linux System Health Utility{RESET}",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -716,59 +2742,27 @@ def main():
   arch-health -a              Run every check available.
   arch-health -k -d           Check only kernel and disk status.
   arch-health -p              Scan for configuration merges.
+  arch-health diff OLD NEW    Compare two --json reports (see 'diff --help').
 
 {BOLD}Extended Descriptions:{RESET}
-  {BOLD}--kernel{RESET}   Compares 'uname -r' with the version in the pacman DB. 
-             If they differ, your system cannot load new modules until reboot.
-             
-  {BOLD}--pacnew{RESET}   Scans /etc for .pacnew and .pacsave files. These are created 
-             when an update has a new default config but you've modified yours.
-             
-  {BOLD}--services{RESET} Queries systemd for any units in a 'failed' state. Useful for 
-             catching silent background daemon crashes.
-             
-  {BOLD}--orphans{RESET}  Lists packages installed as dependencies but no longer required 
-             by any other package. Helps keep the system lean.
-             
-  {BOLD}--disk{RESET}     Analyzes usage for /, /boot, and /home. Specifically tracks 
-             LVM/LUKS lineage to show you the physical origin of each mount.
-
-  {BOLD}--stats{RESET}     Show pacman package statistics (Native vs AUR)
+{extended}
         """
     )
 
 
-    group_logo = parser.add_mutually_exclusive_group()
-    _ = group_logo.add_argument("-l", "--logo", dest="logo", action="store_true", default=None, help="Print the Arch logo and hardware summary [--no-logo to suppress]")
-    _ = group_logo.add_argument("--no-logo", dest="logo", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_sensors = parser.add_mutually_exclusive_group()
-    _ = group_sensors.add_argument("--sensors", dest="sensors", action="store_true", default=None, help="Show all available temperature sensors and warn if high [--no-sensors to suppress]")
-    _ = group_sensors.add_argument("--no-sensors", dest="sensors", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_kernel = parser.add_mutually_exclusive_group()
-    _ = group_kernel.add_argument("-k", "--kernel", dest="kernel", action="store_true", default=None, help="Check for kernel/running version mismatch [--no-kernel to suppress]")
-    _ = group_kernel.add_argument("--no-kernel", dest="kernel", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_pacnew = parser.add_mutually_exclusive_group()
-    _ = group_pacnew.add_argument("-p", "--pacnew", dest="pacnew", action="store_true", default=None, help="Scan for unmerged .pacnew config files [--no-pacnew to suppress]")
-    _ = group_pacnew.add_argument("--no-pacnew", dest="pacnew", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_services = parser.add_mutually_exclusive_group()
-    _ = group_services.add_argument("-s", "--services", dest="services", action="store_true", default=None, help="List failed systemd services [--no-services to suppress]")
-    _ = group_services.add_argument("--no-services", dest="services", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_orphans = parser.add_mutually_exclusive_group()
-    _ = group_orphans.add_argument("-o", "--orphans", dest="orphans", action="store_true", default=None, help="List orphaned packages (unused dependencies) [--no-orphans to suppress]")
-    _ = group_orphans.add_argument("--no-orphans", dest="orphans", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_disk = parser.add_mutually_exclusive_group()
-    _ = group_disk.add_argument("-d", "--disk", dest="disk", action="store_true", default=None, help="Show usage, filesystem type, and LVM/LUKS origin [--no-disk to suppress]")
-    _ = group_disk.add_argument("--no-disk", dest="disk", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_stats = parser.add_mutually_exclusive_group()
-    _ = group_stats.add_argument("-t", "--stats", dest="stats", action="store_true", default=None, help="Show pacman package statistics (Native vs AUR) [--no-stats to suppress]")
-    _ = group_stats.add_argument("--no-stats", dest="stats", action="store_false", default=None, help=argparse.SUPPRESS)
-    group_smart = parser.add_mutually_exclusive_group()
-    _ = group_smart.add_argument("--smart", dest="smart", action="store_true", default=None, help="Show SMART disk health summary (if supported) [--no-smart to suppress]")
-    _ = group_smart.add_argument("--no-smart", dest="smart", action="store_false", default=None, help=argparse.SUPPRESS)
+    for name, spec in CHECKS.items():
+        group = parser.add_mutually_exclusive_group()
+        _ = group.add_argument(*spec["flags"], dest=name, action="store_true", default=None, help=f"{spec['help']} [--no-{name} to suppress]")
+        _ = group.add_argument(f"--no-{name}", dest=name, action="store_false", default=None, help=argparse.SUPPRESS)
+    for name, spec in CHECKS.items():
+        if spec["arguments"]:
+            spec["arguments"](parser)
+    _ = parser.add_argument("--root", action="append", default=None, metavar="PATH", help="Check a mounted image/sysroot instead of the running system; repeat for a parallel batch")
+    _ = parser.add_argument("--output-dir", default=None, metavar="DIR", help="With several --root, write one JSON report per root to DIR")
+    _ = parser.add_argument("--jobs", type=int, default=None, metavar="N", help="Worker processes for parallel checks (default: CPU count)")
     _ = parser.add_argument("-a", "--all", action="store_true", help="Perform all health checks and show logo")
     _ = parser.add_argument("-j","--json", action="store_true", help="Output all results in JSON format for further processing")
     _ = parser.add_argument("--log-level", default="WARNING", help="Set log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)")
-    import sys
     color_group = parser.add_mutually_exclusive_group()
     # Default: color if stdout is a terminal, no color if piped
     default_color = sys.stdout.isatty()
@@ -780,33 +2774,25 @@ def main():
     parser.formatter_class = lambda prog: argparse.RawTextHelpFormatter(prog, max_help_position=32)
     
     args = parser.parse_args()
-    # Set up logging
-    log_level = getattr(logging, str(args.log_level).upper(), logging.WARNING)
-    logging.basicConfig(level=log_level, format='[%(levelname)s] %(message)s')
-    logger = logging.getLogger(__name__)
 
     # Determine color: explicit flag wins, else auto-detect
     if args.color is not None:
         use_color = args.color
     else:
         use_color = default_color
-    colors = get_colors(use_color)
-    globals()['BLUE'] = colors['BLUE']
-    globals()['CYAN'] = colors['CYAN']
-    globals()['RED'] = colors['RED']
-    globals()['GREEN'] = colors['GREEN']
-    globals()['YELLOW'] = colors['YELLOW']
-    globals()['BOLD'] = colors['BOLD']
-    globals()['RESET'] = colors['RESET']
+    set_colors(use_color)
     # 2. Help/Early Exit Check
     if len(sys.argv) == 1:
         parser.print_help()
         sys.exit(0)
 
+    roots = args.root or ["/"]
+    offline = roots != ["/"]
+
     # 3. THE ARCH CHECK (The Gatekeeper)
-    if not os.path.exists("/etc/arch-release"):
+    if len(roots) == 1 and not os.path.exists(os.path.join(roots[0], "etc/arch-release")):
         print(f"{RED}{BOLD}Error:{RESET} This script requires Arch Linux.")
-        print("Required file '/etc/arch-release' not found.")
+        print(f"Required file '{os.path.join(roots[0], 'etc/arch-release')}' not found.")
         sys.exit(1)
     
 # 4. Proceed with checks...
@@ -815,76 +2801,54 @@ def main():
     global issue_count
     issue_count = 0
     # Merge --feature/--no-feature into a single flag for each feature
-    if args.all:
-        logo_flag = True if args.logo is not False else False
-        sensors_flag = True if args.sensors is not False else False
-        smart_flag = True if args.smart is not False else False
-        kernel_flag = True if args.kernel is not False else False
-        pacnew_flag = True if args.pacnew is not False else False
-        services_flag = True if args.services is not False else False
-        orphans_flag = True if args.orphans is not False else False
-        disk_flag = True if args.disk is not False else False
-        stats_flag = True if args.stats is not False else False
-    else:
-        logo_flag = True if args.logo is True else False
-        sensors_flag = True if args.sensors is True else False
-        smart_flag = True if args.smart is True else False
-        kernel_flag = True if args.kernel is True else False
-        pacnew_flag = True if args.pacnew is True else False
-        services_flag = True if args.services is True else False
-        orphans_flag = True if args.orphans is True else False
-        disk_flag = True if args.disk is True else False
-        stats_flag = True if args.stats is True else False
+    enabled = []
+    for name, spec in CHECKS.items():
+        value = getattr(args, name)
+        if value is True or (args.all and value is not False and spec["in_all"]):
+            if offline and spec["host_only"]:
+                if value is True:
+                    logger.warning(f"--{name} inspects the running system and is skipped with --root")
+                continue
+            enabled.append(name)
+    logger.debug(f"[DEBUG] Enabled checks: {enabled}")
 
     import json
-    checks = [
-        (logo_flag, print_logo_info, 'logo'),
-        (sensors_flag, check_sensors, 'sensors'),
-        (smart_flag, check_smart, 'smart'),
-        (kernel_flag, check_kernel(), 'kernel'),
-        (pacnew_flag, check_pacnew, 'pacnew'),
-        (services_flag, check_failed_services, 'services'),
-        (orphans_flag, check_orphans, 'orphans'),
-        (disk_flag, check_disk, 'disk'),
-        (stats_flag, check_stats, 'stats'),
-    ]
+    import functools
+    checks = []
+    for name in enabled:
+        spec = CHECKS[name]
+        kwargs = spec["options"](args) if spec["options"] else {}
+        checks.append((spec, functools.partial(spec["func"], **kwargs), name))
+
+    if len(roots) > 1:
+        plan = [(name, (CHECKS[name]["options"](args) if CHECKS[name]["options"] else {})) for name in enabled]
+        run_batch(roots, plan, jobs=args.jobs, output_dir=args.output_dir)
+        return
 
-    enabled = [name for flag, _, name in checks if flag]
-    logger.debug(f"[DEBUG] Enabled checks: {enabled}")
+    # Fetch the raw data of all enabled checks concurrently; each provider runs once
+    globals()['DATA'] = DataContext(root=roots[0])
+    DATA.prefetch(p for spec, _, _ in checks for p in spec["providers"])
 
     if args.json:
-        results = {}
-        for selected, func, name in checks:
-            if selected:
-                # All checks that support as_dict should use it
-                if name in ('kernel', 'smart', 'pacnew', 'services', 'orphans', 'stats', 'sensors', 'disk'):
-                    # check_sensors needs temp_warn default
-                    if name == 'sensors':
-                        results[name] = func(as_dict=True)
-                    else:
-                        results[name] = func(as_dict=True)
-                else:
-                    results[name] = None
-        # Add summary with per-section issues
-        issues_by_section = {k: (v.get('issues', 0) if isinstance(v, dict) else 0) for k, v in results.items() if k != 'summary'}
-        results['summary'] = {
-            'issues': sum(issues_by_section.values()),
-            'issues_by_section': issues_by_section,
-            'status': 'ok' if all((v.get('status', 'ok') == 'ok' if isinstance(v, dict) else True) for v in results.values() if v) else 'attention',
-        }
+        results = build_report(checks)
+        if offline:
+            results['summary']['root'] = roots[0]
         print(json.dumps(results, indent=2))
     else:
-        for selected, func, name in checks:
-            if selected:
-                res = func()  # Some checks return dicts, some print directly
+        printed = {}
+        for spec, func, name in checks:
+            res = func()  # Some checks return dicts, some print directly
+            printed[name] = res
         print_header("Summary")
         # Collect per-section issues for enabled checks
         issues_by_section = {}
-        for selected, func, name in checks:
-            if selected and name in ('kernel', 'smart', 'pacnew', 'services', 'orphans', 'stats', 'sensors', 'disk'):
+        for spec, func, name in checks:
+            if spec["structured"]:
                 try:
-                    if name == 'sensors':
-                        result = func(as_dict=True)
+                    # Built-in checks return their result dict when printing; only plugin
+                    # checks that print without returning one are re-run as dict
+                    if isinstance(printed.get(name), dict):
+                        result = printed[name]
                     else:
                         result = func(as_dict=True)
                     issues_by_section[name] = result.get('issues', 0) if isinstance(result, dict) else 0
@@ -900,6 +2864,7 @@ def main():
         else:
             print(f"{RED}{BOLD}✘ Attention Required: {issue_count} potential issue(s) found.{RESET}")
         print("")
+    DATA.close()
 
 
 if __name__ == "__main__":
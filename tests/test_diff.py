@@ -0,0 +1,76 @@
+import arch_check
+
+
+def paths(changes):
+    return {(c["path"], c["change"]) for c in changes}
+
+
+def test_integrity_mismatches_matched_by_package_and_path():
+    old = {"integrity": {"mismatches": [
+        {"package": "foo", "path": "/a", "problem": "sha256", "backup": False},
+        {"package": "foo", "path": "/b", "problem": "size", "backup": False},
+    ]}}
+    new = {"integrity": {"mismatches": [
+        {"package": "foo", "path": "/b", "problem": "size", "backup": False},
+    ]}}
+    changes = arch_check.diff_reports(old, new)
+    assert changes == [{
+        "path": "integrity.mismatches[package=foo,path=/a]",
+        "change": "removed",
+        "old": {"package": "foo", "path": "/a", "problem": "sha256", "backup": False},
+    }]
+
+
+def test_integrity_mismatch_problem_change():
+    old = {"integrity": {"mismatches": [{"package": "foo", "path": "/a", "problem": "size", "backup": False}]}}
+    new = {"integrity": {"mismatches": [{"package": "foo", "path": "/a", "problem": "sha256", "backup": False}]}}
+    assert paths(arch_check.diff_reports(old, new)) == {
+        ("integrity.mismatches[package=foo,path=/a].problem", "changed")}
+
+
+SENSORS_OLD = """coretemp-isa-0000
+Adapter: ISA adapter
+Package id 0:  +43.0°C  (high = +80.0°C, crit = +100.0°C)
+Core 0:        +41.0°C  (high = +80.0°C, crit = +100.0°C)
+
+acpitz-acpi-0
+Adapter: ACPI interface
+temp1:        +27.8°C
+"""
+
+
+def sensors_report(monkeypatch, output):
+    monkeypatch.setattr(arch_check, "DATA", arch_check.DataContext())
+    monkeypatch.setitem(arch_check.PROVIDERS, "sensors", lambda ctx: output)
+    return {"sensors": arch_check.check_sensors(as_dict=True)}
+
+
+def test_sensor_entries_named_without_reading(monkeypatch):
+    report = sensors_report(monkeypatch, SENSORS_OLD)
+    assert [s["name"] for s in report["sensors"]["sensors"]] == [
+        "coretemp-isa-0000/Package id 0", "coretemp-isa-0000/Core 0", "acpitz-acpi-0/temp1"]
+
+
+def test_sensor_reading_change_is_a_temp_change(monkeypatch):
+    old = sensors_report(monkeypatch, SENSORS_OLD)
+    new = sensors_report(monkeypatch, SENSORS_OLD.replace("+43.0°C", "+44.0°C").replace("+41.0°C", "+49.0°C"))
+    changes = arch_check.diff_reports(old, new)
+    # 43 -> 44 is below the 5 degree threshold, 41 -> 49 is reported as a change, not remove/add
+    assert changes == [{
+        "path": "sensors.sensors[name=coretemp-isa-0000/Core 0].temp",
+        "change": "changed", "old": 41.0, "new": 49.0, "delta": 8.0,
+    }]
+
+
+def test_duplicate_keys_are_not_paired_by_position():
+    old = {"x": {"items": [{"name": "a", "v": 1}, {"name": "a", "v": 2}]}}
+    new = {"x": {"items": [{"name": "a", "v": 2}]}}
+    assert arch_check.diff_reports(old, new) == [
+        {"path": "x.items", "change": "removed", "old": {"name": "a", "v": 1}}]
+
+
+def test_mounts_keyed_by_mount():
+    old = {"disk": {"mounts": [{"mount": "/", "usage_percent": 50.0}, {"mount": "/home", "usage_percent": 10.0}]}}
+    new = {"disk": {"mounts": [{"mount": "/home", "usage_percent": 10.5}, {"mount": "/", "usage_percent": 55.0}]}}
+    assert arch_check.diff_reports(old, new) == [
+        {"path": "disk.mounts[mount=/].usage_percent", "change": "changed", "old": 50.0, "new": 55.0, "delta": 5.0}]
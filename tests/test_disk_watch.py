@@ -0,0 +1,25 @@
+import select
+
+import arch_check
+
+
+class InterruptedPoller:
+    def register(self, fd, events):
+        pass
+
+    def poll(self):
+        raise KeyboardInterrupt
+
+
+def test_watch_runs_the_initial_check_once(monkeypatch):
+    calls = []
+
+    def fake_check_disk(as_dict=False, **kwargs):
+        calls.append((as_dict, kwargs))
+        return {"mounts": [{"mount": "/", "status": "ok"}], "status": "ok", "issues": 0}
+
+    monkeypatch.setattr(arch_check, "check_disk", fake_check_disk)
+    monkeypatch.setattr(select, "poll", InterruptedPoller)
+    result = arch_check.watch_disk(as_dict=False, drill_down=True, top_n=5, time_budget=1.0)
+    assert calls == [(False, {"drill_down": True, "top_n": 5, "time_budget": 1.0})]
+    assert result["mounts"] == [{"mount": "/", "status": "ok"}]
@@ -0,0 +1,120 @@
+import pytest
+
+import arch_check
+
+# major minor name reads merged sectors ms writes merged sectors ms in_flight io_ms weighted_ms
+DISKSTATS_BEFORE = """\
+ 259       0 nvme0n1 1000 0 20000 500 2000 0 40000 1000 0 3000 1500 0 0 0 0
+ 259       1 nvme0n1p1 10 0 200 5 0 0 0 0 0 10 5 0 0 0 0
+ 259       2 nvme0n1p2 990 0 19800 495 2000 0 40000 1000 0 2990 1495 0 0 0 0
+   8       0 sda 5000 0 100000 10000 100 0 800 100 0 50000 10100 0 0 0 0
+ 254       0 dm-0 900 0 18000 450 1800 0 36000 900 0 2800 1350 0 0 0 0
+   7       0 loop0 50 0 100 1 0 0 0 0 0 1 1 0 0 0 0
+  11       0 sr0 1 0 8 1 0 0 0 0 0 1 1 0 0 0 0
+"""
+
+# Two seconds later: sda busy and slow, nvme light
+DISKSTATS_AFTER = """\
+ 259       0 nvme0n1 1020 0 20400 504 2080 0 41600 1004 0 3060 1508 0 0 0 0
+ 259       1 nvme0n1p1 10 0 200 5 0 0 0 0 0 10 5 0 0 0 0
+ 259       2 nvme0n1p2 1010 0 20200 499 2080 0 41600 1004 0 3050 1503 0 0 0 0
+   8       0 sda 5280 0 135840 69472 100 0 800 100 0 51960 69572 0 0 0 0
+ 254       0 dm-0 920 0 18400 455 1880 0 37600 904 0 2860 1359 0 0 0 0
+   7       0 loop0 60 0 120 1 0 0 0 0 0 1 1 0 0 0 0
+  11       0 sr0 1 0 8 1 0 0 0 0 0 1 1 0 0 0 0
+"""
+
+LSBLK = [
+    {"name": "nvme0n1", "mountpoints": [None], "children": [
+        {"name": "nvme0n1p1", "mountpoints": ["/boot"]},
+        {"name": "nvme0n1p2", "mountpoints": [None], "children": [
+            {"name": "cryptroot", "mountpoints": ["/", "/home"]},
+        ]},
+    ]},
+    {"name": "sda", "mountpoints": [None]},
+]
+
+
+@pytest.fixture
+def procfs(monkeypatch):
+    files = {"/proc/diskstats": DISKSTATS_BEFORE, "/sys/block/dm-0/dm/name": "cryptroot\n"}
+
+    def read_proc(path, size=65536):
+        if path not in files:
+            raise FileNotFoundError(path)
+        return files[path]
+
+    monkeypatch.setattr(arch_check, "read_proc", read_proc)
+    return files
+
+
+def test_read_diskstats_fields(procfs):
+    _, stats = arch_check.read_diskstats()
+    assert set(stats) == {"nvme0n1", "nvme0n1p1", "nvme0n1p2", "sda", "dm-0"}
+    assert stats["sda"] == {"reads": 5000, "read_sectors": 100000, "read_ms": 10000,
+                            "writes": 100, "write_sectors": 800, "write_ms": 100, "io_ms": 50000}
+
+
+def test_dm_name_mapping(procfs):
+    assert arch_check._kernel_to_lsblk_name("dm-0") == "cryptroot"
+    assert arch_check._kernel_to_lsblk_name("dm-7") == "dm-7"
+    assert arch_check._kernel_to_lsblk_name("sda") == "sda"
+
+
+def test_lsblk_origins():
+    origins = arch_check._lsblk_origins(LSBLK)
+    assert origins["cryptroot"] == {"origin": "nvme0n1.nvme0n1p2.cryptroot", "mountpoints": ["/", "/home"]}
+    assert origins["nvme0n1"]["mountpoints"] == []
+
+
+def test_check_diskio_rates_and_slow_flag(procfs, monkeypatch):
+    _, before = arch_check.read_diskstats()
+    procfs["/proc/diskstats"] = DISKSTATS_AFTER
+    _, after = arch_check.read_diskstats()
+    monkeypatch.setattr(arch_check, "DATA", arch_check.DataContext())
+    monkeypatch.setitem(arch_check.PROVIDERS, "diskstats", lambda ctx: (100.0, before))
+    monkeypatch.setitem(arch_check.PROVIDERS, "lsblk", lambda ctx: LSBLK)
+    monkeypatch.setattr(arch_check, "read_diskstats", lambda: (102.0, after))
+
+    result = arch_check.check_diskio(as_dict=True, interval=0, await_warn_ms=100.0, util_warn=90.0)
+    devices = {d["device"]: d for d in result["devices"]}
+    assert result["interval_s"] == 2.0
+
+    sda = devices["/dev/sda"]
+    assert sda["util_pct"] == 98.0            # 1960 ms busy in 2 s
+    assert sda["read_iops"] == 140.0          # 280 reads / 2 s
+    assert sda["write_iops"] == 0.0
+    assert sda["read_mb_s"] == 9.18           # 35840 sectors * 512 B / 2 s
+    assert sda["read_await_ms"] == 212.4      # 59472 ms / 280 reads
+    assert sda["write_await_ms"] == 0.0
+    assert sda["status"] == "slow"
+    assert sda["warnings"] == ["util 98.0%", "await 212.4ms"]
+
+    nvme = devices["/dev/nvme0n1p2"]
+    assert nvme["util_pct"] == 3.0
+    assert nvme["read_iops"] == 10.0 and nvme["write_iops"] == 40.0
+    assert nvme["read_await_ms"] == 0.2 and nvme["write_await_ms"] == 0.05
+    assert nvme["write_mb_s"] == 0.41        # 1600 sectors * 512 B / 2 s
+    assert nvme["status"] == "ok" and nvme["origin"] == "nvme0n1.nvme0n1p2"
+
+    crypt = devices["/dev/cryptroot"]
+    assert crypt["kernel_name"] == "dm-0"
+    assert crypt["mapper_path"] == "/dev/mapper/cryptroot"
+    assert crypt["origin"] == "nvme0n1.nvme0n1p2.cryptroot"
+    assert crypt["mountpoints"] == ["/", "/home"]
+
+    # Idle partition is still listed; loop/sr devices never are
+    assert devices["/dev/nvme0n1p1"]["util_pct"] == 0.0
+    assert result["status"] == "slow" and result["issues"] == 1
+
+
+def test_check_diskio_thresholds(procfs, monkeypatch):
+    _, before = arch_check.read_diskstats()
+    procfs["/proc/diskstats"] = DISKSTATS_AFTER
+    _, after = arch_check.read_diskstats()
+    monkeypatch.setattr(arch_check, "DATA", arch_check.DataContext())
+    monkeypatch.setitem(arch_check.PROVIDERS, "diskstats", lambda ctx: (100.0, before))
+    monkeypatch.setitem(arch_check.PROVIDERS, "lsblk", lambda ctx: LSBLK)
+    monkeypatch.setattr(arch_check, "read_diskstats", lambda: (102.0, after))
+    result = arch_check.check_diskio(as_dict=True, interval=0, await_warn_ms=1000.0, util_warn=99.0)
+    assert result["status"] == "ok" and result["issues"] == 0
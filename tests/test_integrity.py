@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import os
+
+import arch_check
+
+
+def make_package(root, name, mtree_lines, raw=None):
+    pkg_dir = root / "var/lib/pacman/local" / name
+    pkg_dir.mkdir(parents=True)
+    (pkg_dir / "desc").write_text(f"%NAME%\n{name}\n")
+    if raw is not None:
+        (pkg_dir / "mtree").write_bytes(raw)
+    else:
+        with gzip.open(pkg_dir / "mtree", "wb") as f:
+            f.write(("#mtree\n/set type=file uid=0 gid=0 mode=644\n" + "\n".join(mtree_lines) + "\n").encode())
+    return str(pkg_dir)
+
+
+def add_file(root, path, data=b"hello\n", mode=0o644):
+    full = root / path.lstrip("/")
+    full.parent.mkdir(parents=True, exist_ok=True)
+    full.write_bytes(data)
+    os.chmod(full, mode)
+    return f"./{path.lstrip('/')} size={len(data)} sha256digest={hashlib.sha256(data).hexdigest()}"
+
+
+def test_bad_entry_does_not_stop_the_package(tmp_path):
+    bad = add_file(tmp_path, "/usr/share/foo/a") + " mode=9z9"
+    good = add_file(tmp_path, "/usr/share/foo/b")
+    changed = add_file(tmp_path, "/usr/share/foo/c")
+    (tmp_path / "usr/share/foo/c").write_bytes(b"HELLO\n")
+    pkg = make_package(tmp_path, "foo-1.0-1", [bad, good, changed])
+    res = arch_check._verify_package(pkg, str(tmp_path))
+    assert res["files"] == 3
+    assert res["hashed"] == 2
+    assert [e["path"] for e in res["errors"]] == ["/usr/share/foo/a"]
+    assert "ValueError" in res["errors"][0]["error"]
+    assert res["mismatches"] == [{"path": "/usr/share/foo/c", "problem": "sha256 mismatch", "backup": False}]
+    assert res["error"] is None
+
+
+def test_corrupt_mtree_is_reported(tmp_path):
+    pkg = make_package(tmp_path, "bar-1.0-1", [], raw=b"not gzip at all")
+    res = arch_check._verify_package(pkg, str(tmp_path))
+    assert res["error"].startswith("BadGzipFile")
+    assert res["files"] == 0
+
+
+def test_check_integrity_does_not_look_clean(tmp_path):
+    make_package(tmp_path, "ok-1.0-1", [add_file(tmp_path, "/usr/share/ok/x")])
+    make_package(tmp_path, "bar-1.0-1", [], raw=b"not gzip at all")
+    summary = arch_check.check_integrity(as_dict=True, jobs=1, cache_file=str(tmp_path / "cache.json"), root=str(tmp_path))
+    assert summary["packages"] == 2
+    assert summary["failed_packages"] == 1
+    assert summary["status"] == "incomplete"
+    assert summary["issues"] == 1
+    assert [(e["package"], e["path"]) for e in summary["errors"]] == [("bar-1.0-1", None)]
+
+
+def test_check_integrity_clean(tmp_path):
+    make_package(tmp_path, "ok-1.0-1", [add_file(tmp_path, "/usr/share/ok/x")])
+    summary = arch_check.check_integrity(as_dict=True, jobs=1, cache_file=str(tmp_path / "cache.json"), root=str(tmp_path))
+    assert summary["status"] == "ok" and summary["issues"] == 0 and summary["errors"] == []
@@ -0,0 +1,60 @@
+import os
+import stat
+
+import pytest
+
+import arch_check
+
+FAKE_JOURNALCTL = """#!/usr/bin/env python3
+import json, sys
+if {fail!r}:
+    sys.stderr.write("Failed to open journal\\n")
+    sys.exit(1)
+after = [a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--after-cursor=")]
+if after and not after[0].startswith("c"):
+    sys.stderr.write("Failed to seek to cursor: Invalid argument\\n")
+    sys.exit(1)
+start = int(after[0][1:]) + 1 if after else 0
+msgs = ["Out of memory: Killed process 123 (firefox)", "blk_update_request: I/O error, dev sda"]
+for i in range(start, len(msgs)):
+    print(json.dumps({{"MESSAGE": msgs[i], "SYSLOG_IDENTIFIER": "kernel",
+                       "__REALTIME_TIMESTAMP": "1700000000000000", "__CURSOR": "c%d" % i}}))
+"""
+
+
+@pytest.fixture
+def journalctl(tmp_path, monkeypatch):
+    def install(fail=False):
+        path = tmp_path / "journalctl"
+        path.write_text(FAKE_JOURNALCTL.format(fail=fail))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+def test_journalctl_failure_is_an_error(journalctl):
+    journalctl(fail=True)
+    result = arch_check.check_journal(as_dict=True)
+    assert result["status"] == "error"
+    assert "Failed to open journal" in result["error"]
+
+
+def test_cursor_is_saved_and_used(journalctl, tmp_path):
+    journalctl()
+    cursor = tmp_path / "cursor"
+    first = arch_check.check_journal(as_dict=True, cursor_file=str(cursor))
+    assert first["total"] == 2 and not first["incremental"]
+    assert cursor.read_text() == "c1\n"
+    second = arch_check.check_journal(as_dict=True, cursor_file=str(cursor))
+    assert second["total"] == 0 and second["incremental"] and second["status"] == "ok"
+
+
+def test_corrupt_cursor_is_reset(journalctl, tmp_path):
+    journalctl()
+    cursor = tmp_path / "cursor"
+    cursor.write_text("garbage\n")
+    result = arch_check.check_journal(as_dict=True, cursor_file=str(cursor))
+    assert result["total"] == 2
+    assert not result["incremental"]
+    assert set(result["categories"]) == {"oom", "storage"}
+    assert cursor.read_text() == "c1\n"
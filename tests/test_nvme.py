@@ -0,0 +1,89 @@
+import os
+import struct
+
+import pytest
+
+import arch_check
+from conftest import FIXTURES
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_passthru_struct_is_72_bytes():
+    assert struct.calcsize(arch_check.NVME_PASSTHRU_FORMAT) == 72
+
+
+def test_decode_healthy_log():
+    log = arch_check.decode_nvme_smart_log(load("nvme_smart_healthy.bin"))
+    assert log == {
+        "critical_warning": 0,
+        "critical_warnings": [],
+        "temperature_c": 35,
+        "available_spare_pct": 100,
+        "available_spare_threshold_pct": 10,
+        "percentage_used": 3,
+        "data_units_read": 12345678,
+        "data_units_written": 23456789,
+        "host_read_commands": 345678901,
+        "host_write_commands": 456789012,
+        "controller_busy_minutes": 1234,
+        "power_cycles": 567,
+        "power_on_hours": 8760,
+        "unsafe_shutdowns": 42,
+        "media_errors": 0,
+        "error_log_entries": 12,
+        "warning_temp_minutes": 0,
+        "critical_temp_minutes": 0,
+        "temperature_sensors_c": [35, 42],
+    }
+
+
+def test_decode_failing_log():
+    log = arch_check.decode_nvme_smart_log(load("nvme_smart_failing.bin"))
+    assert log == {
+        "critical_warning": 0x05,
+        "critical_warnings": ["available spare below threshold", "NVM subsystem reliability degraded"],
+        "temperature_c": 85,
+        "available_spare_pct": 5,
+        "available_spare_threshold_pct": 10,
+        "percentage_used": 104,
+        # 128-bit counters must not be truncated to 64 bits
+        "data_units_read": 2**64 + 5,
+        "data_units_written": 987654321,
+        "host_read_commands": 1000,
+        "host_write_commands": 2000,
+        "controller_busy_minutes": 77,
+        "power_cycles": 3000,
+        "power_on_hours": 45000,
+        "unsafe_shutdowns": 311,
+        "media_errors": 17,
+        "error_log_entries": 250,
+        "warning_temp_minutes": 120,
+        "critical_temp_minutes": 3,
+        "temperature_sensors_c": [85, 90, 67],
+    }
+
+
+def test_decode_rejects_short_log():
+    with pytest.raises(ValueError):
+        arch_check.decode_nvme_smart_log(load("nvme_smart_healthy.bin")[:511])
+
+
+def test_health_attributes_list_warnings():
+    lines = arch_check.nvme_health_attributes(arch_check.decode_nvme_smart_log(load("nvme_smart_failing.bin")))
+    assert lines[0] == "Critical Warning: 0x05 (available spare below threshold, NVM subsystem reliability degraded)"
+    assert "Media Errors: 17" in lines
+
+
+@pytest.mark.parametrize("device, controller", [
+    ("/dev/nvme0n1", "/dev/nvme0"),
+    ("/dev/nvme12n3", "/dev/nvme12"),
+    ("/dev/nvme0", "/dev/nvme0"),
+    ("/dev/sda", "/dev/sda"),
+    ("/dev/nvme0n1p1", "/dev/nvme0n1p1"),
+])
+def test_nvme_controller(device, controller):
+    assert arch_check.nvme_controller(device) == controller
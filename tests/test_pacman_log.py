@@ -0,0 +1,212 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import arch_check
+
+DAY = 86400
+
+
+def stamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("[%Y-%m-%dT%H:%M:%S+0000]")
+
+
+def log(*entries):
+    return "".join(f"{stamp(ts)} {text}\n" for ts, text in entries).encode()
+
+
+T0 = 1_700_000_000
+BOOT = T0 + 10 * DAY
+
+LOG = log(
+    (T0 - DAY, "[PACMAN] Running 'pacman -Sy oldpkg'"),
+    (T0, "[PACMAN] Running 'pacman -Syu'"),
+    (T0, "[PACMAN] synchronizing package lists"),
+    (T0, "[PACMAN] starting full system upgrade"),
+    (T0 + 5, "[ALPM] transaction started"),
+    (T0 + 6, "[ALPM] upgraded linux (6.6.1.arch1-1 -> 6.6.2.arch1-1)"),
+    (T0 + 7, "[ALPM-SCRIPTLET] ==> WARNING: Possibly missing firmware for module: qla2xxx"),
+    (T0 + 8, "[ALPM] warning: /etc/pacman.conf installed as /etc/pacman.conf.pacnew"),
+    (T0 + 9, "[ALPM] transaction completed"),
+    (BOOT + 60, "[PACMAN] Running 'pacman -Sy firefox'"),
+    (BOOT + 61, "[ALPM] upgraded firefox (120-1 -> 121-1)"),
+    (BOOT + 120, "[PACMAN] Running 'pacman -S --config /etc/pacman.conf -- vim'"),
+    (BOOT + 180, "[ALPM] upgraded firefox (121-1 -> 122-1)"),
+)
+
+
+@pytest.mark.parametrize("command, flags", [
+    ("pacman -Sy firefox", (True, True, False)),
+    ("pacman -S -y firefox", (True, True, False)),
+    ("pacman --sync --refresh firefox", (True, True, False)),
+    ("pacman -S --refresh firefox", (True, True, False)),
+    ("pacman -Syu", (True, True, True)),
+    ("pacman -Syyuu", (True, True, True)),
+    ("pacman --sync --refresh --sysupgrade", (True, True, True)),
+    ("pacman -Su", (True, False, True)),
+    ("pacman -S --config /etc/pacman.conf -- vim", (True, False, False)),
+    ("pacman -S -- -y", (True, False, False)),
+    ("pacman -Rns foo", (False, False, False)),
+    ("pacman -S 'unterminated", (True, False, False)),
+])
+def test_command_flags(command, flags):
+    assert arch_check._pacman_command_flags(command) == flags
+
+
+def test_log_time_formats():
+    assert arch_check._pacman_log_time(b"[2023-11-14T22:13:20+0000] [ALPM] x") == 1_700_000_000
+    assert arch_check._pacman_log_time(b"[2023-11-14T23:13:20+0100] [ALPM] x") == 1_700_000_000
+    legacy = datetime(2019, 1, 1, 12, 34).timestamp()
+    assert arch_check._pacman_log_time(b"[2019-01-01 12:34] [PACMAN] x") == legacy
+    assert arch_check._pacman_log_time(b"[garbage] x") == 0.0
+
+
+def test_scan_finds_answers_and_stops_early():
+    state = arch_check.scan_pacman_log(LOG, boot=BOOT)
+    assert state["complete"]
+    assert state["last_full_upgrade"] == T0
+    assert state["full_upgrade_command"] == "pacman -Syu"
+    assert state["partial_upgrades"] == [{"time": BOOT + 60, "command": "pacman -Sy firefox"}]
+    assert state["upgraded"] == {"firefox": {"package": "firefox", "old": "120-1", "new": "122-1", "time": BOOT + 180}}
+    assert state["warnings"] == [f"{stamp(T0 + 7)} [ALPM-SCRIPTLET] ==> WARNING: Possibly missing firmware for module: qla2xxx"]
+    assert state["warning_count"] == 1
+    # The scan stops at the '-Syu' command line; the older partial upgrade is never read
+    assert state["bytes_scanned"] == len(LOG) - len(log((T0 - DAY, "[PACMAN] Running 'pacman -Sy oldpkg'")))
+
+
+def test_scan_continues_to_boot():
+    # Booted before the full upgrade: the upgrades of that transaction count as since boot
+    state = arch_check.scan_pacman_log(LOG, boot=T0 - 10)
+    assert state["upgraded"]["linux"] == {"package": "linux", "old": "6.6.1.arch1-1", "new": "6.6.2.arch1-1", "time": T0 + 6}
+    assert state["upgraded"]["firefox"]["old"] == "120-1"
+
+
+def test_scan_without_full_upgrade_reads_everything():
+    data = log((T0, "[PACMAN] Running 'pacman -Sy foo'"), (T0 + 1, "[ALPM-SCRIPTLET] error: broken"))
+    state = arch_check.scan_pacman_log(data, boot=None)
+    assert not state["complete"]
+    assert state["last_full_upgrade"] is None
+    assert [p["command"] for p in state["partial_upgrades"]] == ["pacman -Sy foo"]
+    assert state["upgraded"] == {}
+    assert state["bytes_scanned"] == len(data)
+
+
+def test_scan_region():
+    head = log((T0, "[PACMAN] Running 'pacman -Syu'"), (T0, "[PACMAN] starting full system upgrade"))
+    tail = log((T0 + 5, "[PACMAN] Running 'pacman -Sy foo'"))
+    state = arch_check.scan_pacman_log(head + tail, start=len(head))
+    assert not state["complete"]
+    assert state["bytes_scanned"] == len(tail)
+    assert [p["command"] for p in state["partial_upgrades"]] == ["pacman -Sy foo"]
+
+
+def test_merge_appended_region_without_full_upgrade():
+    old = arch_check.scan_pacman_log(LOG, boot=BOOT)
+    appended = log((BOOT + 300, "[PACMAN] Running 'pacman -Sy htop'"),
+                   (BOOT + 301, "[ALPM] upgraded firefox (122-1 -> 123-1)"),
+                   (BOOT + 302, "[ALPM-SCRIPTLET] error: oops"))
+    new = arch_check.scan_pacman_log(LOG + appended, start=len(LOG), boot=BOOT)
+    merged = arch_check._merge_pacman_state(old, new, BOOT)
+    assert merged["complete"]
+    assert merged["last_full_upgrade"] == T0
+    assert [p["command"] for p in merged["partial_upgrades"]] == ["pacman -Sy firefox", "pacman -Sy htop"]
+    assert merged["upgraded"]["firefox"]["old"] == "120-1"
+    assert merged["upgraded"]["firefox"]["new"] == "123-1"
+    assert merged["warning_count"] == 2
+
+
+def test_merge_appended_full_upgrade_resets_partials():
+    old = arch_check.scan_pacman_log(LOG, boot=BOOT)
+    appended = log((BOOT + 300, "[PACMAN] Running 'pacman -Syu'"),
+                   (BOOT + 300, "[PACMAN] starting full system upgrade"))
+    new = arch_check.scan_pacman_log(LOG + appended, start=len(LOG), boot=BOOT)
+    merged = arch_check._merge_pacman_state(old, new, BOOT)
+    assert merged["last_full_upgrade"] == BOOT + 300
+    assert merged["partial_upgrades"] == [] and merged["warning_count"] == 0
+    assert merged["upgraded"]["firefox"]["new"] == "122-1"
+
+
+def test_merge_after_reboot_drops_old_upgrades():
+    old = arch_check.scan_pacman_log(LOG, boot=BOOT)
+    new = arch_check.scan_pacman_log(LOG, start=len(LOG), boot=BOOT + DAY)
+    assert arch_check._merge_pacman_state(old, new, BOOT + DAY)["upgraded"] == {}
+
+
+@pytest.fixture
+def sysroot(tmp_path, monkeypatch):
+    (tmp_path / "var/log").mkdir(parents=True)
+    monkeypatch.setattr(arch_check, "DATA", arch_check.DataContext(root=str(tmp_path)))
+    return tmp_path / "var/log/pacman.log"
+
+
+def test_checkpoint_append_and_rotation(sysroot, tmp_path):
+    checkpoint = str(tmp_path / "state/checkpoint.json")
+    now = time.time()
+    sysroot.write_bytes(log((now - 40 * DAY, "[PACMAN] Running 'pacman -Syu'"),
+                            (now - 40 * DAY, "[PACMAN] starting full system upgrade")))
+    first = arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)
+    assert first["stale"] and first["status"] == "stale" and not first["incremental"]
+    saved = json.load(open(checkpoint))
+    assert saved["offset"] == os.path.getsize(sysroot)
+
+    with open(sysroot, "ab") as f:
+        f.write(log((now - 60, "[PACMAN] Running 'pacman -Sy foo'")))
+        f.write(b"[2030-01-01T00:00:00+0000] [ALPM] partial line without newline")
+    second = arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)
+    assert second["incremental"]
+    assert second["days_since_full_upgrade"] == pytest.approx(40, abs=0.1)
+    assert [p["command"] for p in second["partial_upgrades"]] == ["pacman -Sy foo"]
+    assert second["issues"] == 2
+    # The unterminated last line is left for the next run
+    assert json.load(open(checkpoint))["offset"] < os.path.getsize(sysroot)
+
+    with open(sysroot, "ab") as f:
+        f.write(b"\n" + log((now, "[PACMAN] Running 'pacman -Syu'"), (now, "[PACMAN] starting full system upgrade")))
+    third = arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)
+    assert third["status"] == "ok" and third["partial_upgrades"] == [] and third["incremental"]
+
+    # Rotation: a new file (new inode) is scanned from the start
+    os.rename(sysroot, str(sysroot) + ".1")
+    sysroot.write_bytes(log((now, "[PACMAN] Running 'pacman -S vim'")))
+    rotated = arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)
+    assert not rotated["incremental"] and rotated["last_full_upgrade"] is None and rotated["stale"]
+
+
+def test_checkpoint_truncation(sysroot, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    now = time.time()
+    sysroot.write_bytes(log((now, "[PACMAN] Running 'pacman -Syu'"), (now, "[PACMAN] starting full system upgrade")))
+    assert arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)["status"] == "ok"
+    with open(sysroot, "wb"):
+        pass
+    truncated = arch_check.check_upgrades(as_dict=True, checkpoint=checkpoint)
+    assert not truncated["incremental"] and truncated["last_full_upgrade"] is None
+
+
+def test_missing_log_is_an_error(sysroot):
+    result = arch_check.check_upgrades(as_dict=True)
+    assert result["status"] == "error" and "Cannot read" in result["error"]
+
+
+def test_two_full_upgrades_since_boot():
+    data = log(
+        (BOOT + DAY, "[PACMAN] Running 'pacman -Syu'"),
+        (BOOT + DAY, "[PACMAN] starting full system upgrade"),
+        (BOOT + DAY + 5, "[ALPM] upgraded linux (6.6.1.arch1-1 -> 6.6.2.arch1-1)"),
+        (BOOT + 2 * DAY, "[PACMAN] Running 'pacman -Sy foo'"),
+        (BOOT + 3 * DAY, "[PACMAN] Running 'pacman -Syyu'"),
+        (BOOT + 3 * DAY, "[PACMAN] starting full system upgrade"),
+        (BOOT + 3 * DAY + 5, "[ALPM] upgraded linux (6.6.2.arch1-1 -> 6.6.3.arch1-1)"),
+        (BOOT + 4 * DAY, "[PACMAN] Running 'pacman -Sy bar'"),
+    )
+    state = arch_check.scan_pacman_log(data, boot=BOOT)
+    assert state["last_full_upgrade"] == BOOT + 3 * DAY
+    assert state["full_upgrade_command"] == "pacman -Syyu"
+    # Partial upgrades are counted since the newest full upgrade; the earlier one is superseded
+    assert [p["command"] for p in state["partial_upgrades"]] == ["pacman -Sy bar"]
+    # The scan still reaches boot for the upgrade list
+    assert state["upgraded"]["linux"]["old"] == "6.6.1.arch1-1"
+    assert state["upgraded"]["linux"]["new"] == "6.6.3.arch1-1"
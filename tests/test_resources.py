@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+import arch_check
+
+# Fields deliberately out of the usual kernel order, plus an unparsable line
+MEMINFO = """\
+SwapFree:        1048576 kB
+MemAvailable:    4194304 kB
+HugePages_Total:       0
+Hugepagesize:       2048 kB
+MemTotal:       16777216 kB
+Weird:           n/a
+SwapTotal:       4194304 kB
+MemFree:         1048576 kB
+"""
+
+PSI_MEMORY = """\
+some avg10=12.50 avg60=3.10 avg300=0.75 total=123456789
+full avg10=6.00 avg60=1.20 avg300=0.30 total=98765
+"""
+
+PSI_CPU = "some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+
+LOADAVG = "3.50 8.20 2.10 5/1234 56789\n"
+
+
+def test_parse_meminfo_by_name():
+    info = arch_check.parse_meminfo(MEMINFO)
+    assert info["MemTotal"] == 16777216
+    assert info["MemAvailable"] == 4194304
+    assert info["SwapTotal"] == 4194304 and info["SwapFree"] == 1048576
+    assert info["HugePages_Total"] == 0
+    assert "Weird" not in info
+
+
+def test_parse_psi():
+    psi = arch_check.parse_psi(PSI_MEMORY)
+    assert psi == {
+        "some": {"avg10": 12.5, "avg60": 3.1, "avg300": 0.75, "total": 123456789},
+        "full": {"avg10": 6.0, "avg60": 1.2, "avg300": 0.3, "total": 98765},
+    }
+    assert isinstance(psi["some"]["total"], int)
+
+
+def test_parse_loadavg():
+    assert arch_check.parse_loadavg(LOADAVG) == {"load1": 3.5, "load5": 8.2, "load15": 2.1, "running": 5, "tasks": 1234}
+
+
+@pytest.fixture
+def procfiles(tmp_path, monkeypatch):
+    files = {"meminfo": MEMINFO, "loadavg": LOADAVG, "cpu": PSI_CPU, "memory": PSI_MEMORY}
+    paths = {}
+    for key, text in files.items():
+        path = tmp_path / key
+        path.write_text(text)
+        paths[key] = str(path)
+    # No io pressure file: PSI may be partially unavailable
+    paths["io"] = str(tmp_path / "missing")
+    monkeypatch.setattr(arch_check.ResourceSampler, "FILES", paths)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    return paths
+
+
+def test_sampler_sample(procfiles):
+    sampler = arch_check.ResourceSampler(maxlen=5)
+    try:
+        s = sampler.sample()
+    finally:
+        sampler.close()
+    assert s["mem_total_kb"] == 16777216 and s["mem_available_kb"] == 4194304
+    assert s["mem_used_pct"] == 75.0
+    assert s["swap_used_kb"] == 3145728 and s["swap_used_pct"] == 75.0
+    assert s["loadavg"]["load5"] == 8.2
+    assert set(s["psi"]) == {"cpu", "memory"}
+
+
+def test_sampler_ring_buffer_is_bounded(procfiles):
+    sampler = arch_check.ResourceSampler(maxlen=3)
+    try:
+        for _ in range(10):
+            sampler.sample()
+        assert len(sampler.samples) == 3
+        # Files are re-read from offset 0 on every sample
+        with open(procfiles["meminfo"], "w") as f:
+            f.write(MEMINFO.replace("MemAvailable:    4194304", "MemAvailable:    8388608"))
+        sampler.sample()
+        assert len(sampler.samples) == 3
+        assert sampler.samples[-1]["mem_used_pct"] == 50.0
+        assert sampler.samples[0]["mem_used_pct"] == 75.0
+    finally:
+        sampler.close()
+    history = arch_check._resource_history(sampler.samples)
+    assert history["samples"] == 3
+    assert history["mem_used_pct"] == {"min": 50.0, "max": 75.0, "avg": 66.67}
+
+
+def make_sample(mem_avail_pct=50.0, swap_pct=0.0, load5=0.0, psi=None):
+    return {
+        "mem_total_kb": 1000,
+        "mem_available_kb": mem_avail_pct * 10,
+        "swap_used_pct": swap_pct,
+        "loadavg": {"load1": load5, "load5": load5, "load15": load5, "running": 1, "tasks": 1},
+        "psi": psi or {},
+    }
+
+
+def test_evaluate_quiet_system(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    assert arch_check.evaluate_resources(make_sample()) == []
+
+
+def test_evaluate_thresholds(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    t = arch_check.RESOURCE_THRESHOLDS
+    # Exactly at a threshold is still fine; just past it warns
+    at = make_sample(mem_avail_pct=t["mem_available_pct"], swap_pct=t["swap_used_pct"], load5=t["load_per_cpu"] * 4,
+                     psi={"memory": {"some": {"avg10": t["psi_memory_some"]}, "full": {"avg10": t["psi_memory_full"]}}})
+    assert arch_check.evaluate_resources(at) == []
+    past = make_sample(mem_avail_pct=t["mem_available_pct"] - 0.5, swap_pct=t["swap_used_pct"] + 0.1,
+                       load5=t["load_per_cpu"] * 4 + 0.1,
+                       psi={"memory": {"some": {"avg10": t["psi_memory_some"] + 0.1}, "full": {"avg10": t["psi_memory_full"] + 0.1}},
+                            "io": {"some": {"avg10": t["psi_io_some"] + 1}},
+                            "cpu": {"some": {"avg10": t["psi_cpu_some"] + 1}}})
+    warnings = arch_check.evaluate_resources(past)
+    assert warnings == [
+        "Low memory: 9.5% available",
+        "Swap 80.1% used",
+        "Load 8.1 over 4 CPUs",
+        "cpu pressure (some) avg10=51.0%",
+        "memory pressure (some) avg10=10.1%",
+        "memory pressure (full) avg10=5.1%",
+        "io pressure (some) avg10=31.0%",
+    ]
+
+
+def test_evaluate_threshold_override(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    sample = make_sample(swap_pct=50.0)
+    assert arch_check.evaluate_resources(sample) == []
+    assert arch_check.evaluate_resources(sample, {"swap_used_pct": 40.0}) == ["Swap 50.0% used"]
@@ -0,0 +1,60 @@
+import os
+
+import arch_check
+
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def allocated(path):
+    return os.lstat(path).st_blocks * 512
+
+
+def build_tree(root):
+    files = [
+        write(root / "a/big.bin", 256 * 1024),
+        write(root / "a/x/medium.bin", 64 * 1024),
+        write(root / "top.txt", 4096),
+    ]
+    files += [write(root / f"c/small{i}.bin", 4096 * (i + 1)) for i in range(8)]
+    linked = write(root / "b/linked.bin", 128 * 1024)
+    os.link(linked, root / "a/x/hardlink.bin")
+    files.append(linked)
+    return files
+
+
+def test_hardlinks_counted_once(tmp_path):
+    files = build_tree(tmp_path)
+    result = arch_check.analyze_space(str(tmp_path), top_n=50, time_budget=30.0)
+    assert not result["truncated"]
+    assert result["total_bytes"] == sum(allocated(f) for f in files)
+    assert result["scanned_dirs"] == 5   # root, a, a/x, b, c
+    paths = [f["path"] for f in result["largest_files"]]
+    # Only one of the two names of the hardlinked inode is listed
+    assert sum(1 for p in paths if p.endswith(("linked.bin", "hardlink.bin"))) == 1
+    assert len(paths) == len(files)
+    assert result["largest_files"][0] == {"path": str(tmp_path / "a/big.bin"), "bytes": allocated(tmp_path / "a/big.bin")}
+    subtrees = {s["path"]: s["bytes"] for s in result["largest_subtrees"]}
+    assert subtrees[str(tmp_path / "c")] == sum(allocated(tmp_path / f"c/small{i}.bin") for i in range(8))
+
+
+def test_top_n_bounds_every_list(tmp_path):
+    build_tree(tmp_path)
+    result = arch_check.analyze_space(str(tmp_path), top_n=3)
+    assert len(result["largest_files"]) == 3
+    assert len(result["largest_dirs"]) == 3
+    assert len(result["largest_subtrees"]) == 3
+    sizes = [f["bytes"] for f in result["largest_files"]]
+    assert sizes == sorted(sizes, reverse=True)
+    assert result["largest_files"][0]["path"] == str(tmp_path / "a/big.bin")
+
+
+def test_time_budget_truncates(tmp_path):
+    build_tree(tmp_path)
+    result = arch_check.analyze_space(str(tmp_path), top_n=5, time_budget=0)
+    assert result["truncated"]
+    assert result["scanned_dirs"] == 0
+    assert result["total_bytes"] == 0
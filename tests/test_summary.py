@@ -0,0 +1,66 @@
+import os
+import stat
+import sys
+
+import pytest
+
+import arch_check
+
+FAKE_PACMAN = """#!/bin/sh
+echo "pacman $*" >> "{log}"
+case " $* " in
+  *" -Q "*) echo "linux 6.6.3.arch1-1"; echo "foo 1.0-1" ;;
+  *) echo "foo" ;;
+esac
+"""
+
+FAKE_DU = """#!/bin/sh
+echo "du $*" >> "{log}"
+printf '1.0G\\t%s\\n' "$2"
+"""
+
+
+@pytest.fixture
+def sysroot(tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    (root / "etc").mkdir(parents=True)
+    (root / "etc/arch-release").write_text("")
+    (root / "etc/pacman.conf.pacnew").write_text("")
+    (root / "var/cache/pacman/pkg").mkdir(parents=True)
+    (root / "var/lib/pacman/local").mkdir(parents=True)
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    log = tmp_path / "calls.log"
+    log.write_text("")
+    for name, script in (("pacman", FAKE_PACMAN), ("du", FAKE_DU)):
+        path = bindir / name
+        path.write_text(script.format(log=log))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(arch_check, "load_plugins", lambda *a, **k: None)
+    monkeypatch.setattr(arch_check, "DATA", arch_check.DataContext(root=str(root)))
+    return root, log
+
+
+def test_text_mode_runs_each_check_once(sysroot, monkeypatch, capsys):
+    root, log = sysroot
+    monkeypatch.setattr(sys, "argv", ["arch_check", "--root", str(root), "-t", "-o", "-p", "-k", "--no-color"])
+    arch_check.main()
+    calls = log.read_text().splitlines()
+    assert sum(1 for c in calls if c.startswith("du ")) == 1
+    assert len(calls) == len(set(calls))
+    out = capsys.readouterr().out
+    assert "stats: 0" in out and "pacnew: 1" in out
+
+
+@pytest.mark.parametrize("name", ["kernel", "pacnew", "orphans", "stats", "upgrades", "integrity"])
+def test_checks_return_their_result_when_printing(sysroot, name, capsys):
+    result = arch_check.CHECKS[name]["func"]()
+    assert isinstance(result, dict) and "status" in result and "issues" in result
+
+
+def test_smart_returns_result_when_printing(monkeypatch, capsys):
+    import glob
+    monkeypatch.setattr(glob, "glob", lambda pattern: [])
+    result = arch_check.check_smart()
+    assert result["status"] == "no_disks" and result["devices"] == []